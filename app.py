@@ -4,16 +4,22 @@ Configure l'application, initialise la base de données, et définit les routes
 import os
 
 from flask import Flask, render_template
-from src.extensions import socketio
+from src.extensions import socketio, socketio_queue_options
 
 from config import config
 from src.api import api_bp
 from src.auth import auth_bp
+from src.auth.user_cache import user_cache
 from src.ticket import ticket_bp
 from src.ressources import ressources_bp
 from src.planning import plan_bp
 from src.models.database import db
+from src.models.migrations import upgrade
+from src.models.search import rebuild_search_index
+from src.models.ticket_stats import rebuild_ticket_stats
 from src.socketio import socketio_bp
+from src.socketio.write_queue import message_queue
+from src.ticket.deadlines import deadline_scheduler
 
 def create_app() -> Flask:
     """Factory Flask pour créer l'application avec la config appropriée."""
@@ -41,7 +47,13 @@ def create_app() -> Flask:
     app.register_blueprint(ressources_bp)
     app.register_blueprint(socketio_bp)
     
-    socketio.init_app(app)               # ← ajouter
+    # Avec plusieurs workers, les émissions vers les rooms passent par la file partagée
+    socketio.init_app(app, **socketio_queue_options(app.config["SOCKETIO_MESSAGE_QUEUE"],
+                                                    app.config["SOCKETIO_CHANNEL"]))
+    # Démarré à la première requête : les commandes CLI (init-db...) ne le lancent pas
+    deadline_scheduler.init_app(app)
+    message_queue.init_app(app)
+    user_cache.init_app(app)
     return app
 
 
@@ -66,7 +78,29 @@ def health():
 @app.cli.command("init-db")
 def init_db_command():
     db.create_all()
-    print("Base de données initialisée.")
+    applied = upgrade()
+    print(f"Base de données initialisée ({len(applied)} migration(s) appliquée(s)).")
+
+
+@app.cli.command("db-upgrade")
+def db_upgrade_command():
+    """Applique les migrations de schéma manquantes (index, colonnes, tables)."""
+    applied = upgrade()
+    print(f"Migrations appliquées : {applied or 'aucune'}")
+
+
+@app.cli.command("search-reindex")
+def search_reindex_command():
+    """Reconstruit l'index plein texte des tickets existants."""
+    count = rebuild_search_index()
+    print(f"{count} tickets indexés.")
+
+
+@app.cli.command("stats-rebuild")
+def stats_rebuild_command():
+    """Recalcule les compteurs de tickets du tableau de bord depuis la table Ticket."""
+    count = rebuild_ticket_stats()
+    print(f"Compteurs recalculés ({count} tickets).")
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
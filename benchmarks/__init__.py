@@ -0,0 +1 @@
+"""Micro-benchmarks des chemins critiques : python -m benchmarks.<nom> [options]."""
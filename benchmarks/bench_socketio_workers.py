@@ -0,0 +1,89 @@
+"""
+Débit des messages de discussion avec 1 puis N workers reliés par la file Socket.IO partagée.
+
+Chaque worker est un processus qui importe l'application et passe des messages par le handler
+send_message (écriture en base puis diffusion new_message / unread_delta par la file), sans la
+couche WebSocket. Les messages sont écrits un par un (MESSAGE_WRITE_BEHIND=0) : la mise à l'échelle
+ne vient que des workers. Le gain n'a de sens qu'avec une vraie file entre processus et une base qui
+accepte des écritures concurrentes : BENCH_SOCKETIO_QUEUE (ex. redis://localhost:6379/0) et
+BENCH_DATABASE_URL (PostgreSQL) sont donc obligatoires ; local:// et SQLite sont refusés.
+
+    BENCH_SOCKETIO_QUEUE=redis://... BENCH_DATABASE_URL=postgresql://... \
+        python -m benchmarks.bench_socketio_workers [workers] [messages]
+"""
+
+import multiprocessing
+import os
+import sys
+
+from benchmarks.common import bench_app, timed
+
+
+def _worker(user_id: int, channel_id: int, count: int, ready, start) -> None:
+    from flask import request, session
+
+    from app import app
+    from src.models.database import db
+    from src.socketio.chat import on_message
+
+    with app.app_context():
+        db.engine.echo = False
+        with app.test_request_context("/socket.io"):
+            session["user_id"] = user_id
+            request.sid = f"bench-{os.getpid()}"
+            request.namespace = "/"
+            ready.wait()
+            start.wait()
+            for i in range(count):
+                on_message({"channel_id": channel_id, "content": f"message {i}"})
+
+
+def run_workers(workers: int, messages: int, user_id: int, channel_id: int) -> float:
+    context = multiprocessing.get_context("spawn")
+    ready, start = context.Barrier(workers + 1), context.Event()
+    share = messages // workers
+    processes = [
+        context.Process(target=_worker, args=(user_id, channel_id, share, ready, start))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    ready.wait()  # imports et connexions faits : seul l'envoi des messages est chronométré
+
+    def send_all():
+        start.set()
+        for process in processes:
+            process.join()
+
+    return timed(f"{workers} worker(s), {share} messages chacun", share * workers, send_all)
+
+
+def main(workers: int = 4, messages: int = 2000) -> None:
+    queue = os.environ.get("BENCH_SOCKETIO_QUEUE", "")
+    database_url = os.environ.get("BENCH_DATABASE_URL", "")
+    if not queue or queue.startswith("local://"):
+        sys.exit("BENCH_SOCKETIO_QUEUE doit désigner une file partagée entre processus "
+                 "(ex. redis://localhost:6379/0)")
+    if not database_url or database_url.startswith("sqlite"):
+        sys.exit("BENCH_DATABASE_URL doit désigner une base non SQLite (ex. postgresql://localhost/bench)")
+
+    os.environ["SOCKETIO_MESSAGE_QUEUE"] = queue
+    os.environ["MESSAGE_WRITE_BEHIND"] = "0"
+    os.environ["DEADLINE_SCHEDULER"] = "0"
+
+    with bench_app(database_url):
+        from src.models import Channel, Ticket, User
+
+        author = User.create_user("bench", "bench@example.com", "secret")
+        channel = Channel.create(name="Discussion ticket #1")
+        Ticket.create(title="Ticket", content="contenu", author_id=author.id, channel_id=channel.id)
+        user_id, channel_id = author.id, channel.id
+
+        print(f"file Socket.IO : {queue}")
+        before = run_workers(1, messages, user_id, channel_id)
+        after = run_workers(workers, messages, user_id, channel_id)
+        print(f"gain: x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
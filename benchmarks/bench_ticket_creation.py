@@ -0,0 +1,38 @@
+"""
+Débit de création de tickets : trois commits par ticket (ancien create_ticket)
+contre un seul commit via unit_of_work().
+
+    python -m benchmarks.bench_ticket_creation [nombre_de_tickets]
+"""
+
+import sys
+
+from benchmarks.common import bench_app, timed
+
+
+def main(count: int = 500) -> None:
+    with bench_app():
+        from src.models import Channel, Ticket, User
+        from src.models.database import unit_of_work
+
+        author = User.create_user("bench", "bench@example.com", "secret")
+
+        def commit_per_call():
+            for i in range(count):
+                ticket = Ticket.create(title=f"Ticket {i}", content="contenu", author_id=author.id)
+                channel = Channel.create(name=f"Discussion ticket #{ticket.id}")
+                ticket.update(channel_id=channel.id)
+
+        def one_transaction():
+            for i in range(count):
+                with unit_of_work():
+                    ticket = Ticket.create(title=f"Ticket {i}", content="contenu", author_id=author.id)
+                    ticket.channel = Channel.create(name=f"Discussion ticket #{ticket.id}")
+
+        before = timed("ticket + channel, 3 commits", count, commit_per_call)
+        after = timed("ticket + channel, unit_of_work (1 commit)", count, one_transaction)
+        print(f"gain: x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,59 @@
+"""
+Compteurs de messages non lus par ticket pour un utilisateur qui suit beaucoup de discussions :
+une requête par channel pour retrouver son ticket (ancien /api/messages/unread-counts)
+contre une seule requête jointe et groupée.
+
+    python -m benchmarks.bench_unread_counts [nombre_de_channels] [messages_par_channel]
+"""
+
+import sys
+
+from benchmarks.common import bench_app, timed
+
+REPEAT = 20
+
+
+def main(channels: int = 1000, per_channel: int = 20) -> None:
+    with bench_app():
+        from src.models import Channel, Message, Ticket, User
+        from src.models.database import db
+
+        author = User.create_user("bench", "bench@example.com", "secret")
+        reader = User.create_user("lecteur", "lecteur@example.com", "secret")
+        author_id, reader_id = author.id, reader.id
+
+        channel_ids = [
+            row.id for row in db.session.execute(
+                db.insert(Channel).returning(Channel.id),
+                [{"name": f"Discussion ticket #{i}"} for i in range(channels)],
+            )
+        ]
+        db.session.execute(db.insert(Ticket), [
+            {"title": f"Ticket {i}", "content": "contenu", "author_id": author_id, "channel_id": channel_id}
+            for i, channel_id in enumerate(channel_ids)
+        ])
+        db.session.execute(db.insert(Message), [
+            {"content": f"message {i}", "author_id": author_id, "channel_id": channel_id}
+            for channel_id in channel_ids for i in range(per_channel)
+        ])
+        db.session.commit()
+        # la moitié des discussions est déjà lue
+        for channel_id in channel_ids[::2]:
+            Message.mark_channel_as_read(channel_id, reader_id)
+
+        def query_per_channel():
+            for _ in range(REPEAT):
+                counts = Message.get_unread_counts_by_channel(reader_id)
+                {Ticket.find_by_channel_id(channel_id).id: count for channel_id, count in counts}
+
+        def single_query():
+            for _ in range(REPEAT):
+                Message.get_unread_counts_by_ticket(reader_id)
+
+        before = timed(f"{channels} channels, 1 requête par channel", REPEAT, query_per_channel)
+        after = timed(f"{channels} channels, 1 requête groupée", REPEAT, single_query)
+        print(f"gain: x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,47 @@
+"""Outils communs aux benchmarks : application sur une base jetable et chronométrage."""
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def bench_app(database_url: str | None = None):
+    """
+    Application Flask sur une base vide (SQLite temporaire par défaut, ou BENCH_DATABASE_URL).
+    Le moteur étant créé à l'import de l'application, la base doit être choisie avant cet import.
+    """
+    path = None
+    database_url = database_url or os.environ.get("BENCH_DATABASE_URL")
+    if database_url is None:
+        _, path = tempfile.mkstemp(suffix=".db")
+        database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from app import app
+    from src.models.database import db
+    from src.models.migrations import upgrade
+
+    with app.app_context():
+        db.engine.echo = False
+        db.drop_all()
+        db.create_all()
+        upgrade()
+        try:
+            yield app
+        finally:
+            db.session.remove()
+            db.drop_all()
+    if path:
+        os.remove(path)
+
+
+def timed(label: str, count: int, func) -> float:
+    """Exécute func() et affiche le débit obtenu en opérations par seconde."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"{label:<45} {count:>7} ops  {elapsed:8.3f} s  {rate:10.1f} ops/s")
+    return rate
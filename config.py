@@ -40,6 +40,38 @@ class Config:
     SQLALCHEMY_DATABASE_URI = _get_database_uri()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Pagination par curseur de la liste des tickets
+    TICKETS_PAGE_SIZE = 20
+    TICKETS_MAX_PAGE_SIZE = 100
+
+    # Taille des paquets lus en base par les réponses en streaming (?stream=json|ndjson)
+    STREAM_CHUNK_SIZE = 500
+
+    # Historique des discussions, chargé à l'ouverture puis page par page vers le passé
+    MESSAGES_PAGE_SIZE = 30
+    MESSAGES_MAX_PAGE_SIZE = 100
+
+    # Notifications "deadline" : envoyées 1 jour, 1 heure puis à l'échéance (délais en secondes)
+    DEADLINE_SCHEDULER_ENABLED = os.environ.get("DEADLINE_SCHEDULER", "1") != "0"
+    DEADLINE_LEAD_TIMES = (86400, 3600, 0)
+    DEADLINE_WINDOW = 6 * 3600  # échéances chargées en mémoire par fenêtre de 6 h
+    DEADLINE_GRACE = 3600       # rattrapage des notifications manquées pendant un redémarrage
+    DEADLINE_REFRESH = 60       # relecture des échéances modifiées ailleurs et renouvellement du bail
+
+    # Messages de discussion écrits par lots :
+    # une rafale de MESSAGE_BATCH_WINDOW secondes = 1 INSERT + 1 commit
+    MESSAGE_WRITE_BEHIND = os.environ.get("MESSAGE_WRITE_BEHIND", "1") != "0"
+    MESSAGE_BATCH_WINDOW = 0.005
+    MESSAGE_BATCH_MAX = 500
+
+    # Cache par processus des utilisateurs connectés (g.user) : nombre d'entrées, durée de vie en secondes
+    USER_CACHE_SIZE = 1024
+    USER_CACHE_TTL = 60
+
+    # File partagée par les workers Socket.IO (redis://..., amqp://..., local:// pour les tests)
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE")
+    SOCKETIO_CHANNEL = os.environ.get("SOCKETIO_CHANNEL", "flask-socketio")
+
 
 class DevelopmentConfig(Config):
     """Configuration pour le développement."""
@@ -2,8 +2,9 @@
 Script principal pour importer les tasks, utilisateurs et produits en une seule commande.
 """
 from app import create_app
-from datafixtures.import_tasks import import_tasks
+from datafixtures.import_tasks import import_tasks, import_tickets
 from src.models.database import db
+from src.models.migrations import upgrade
 
 if __name__ == "__main__":
     app = create_app()
@@ -11,6 +12,9 @@ if __name__ == "__main__":
         print("Suppression et création des tables...")
         db.drop_all()
         db.create_all()
+        upgrade()
         print("Import des tasks...")
         import_tasks()
+        print("Import des tickets...")
+        import_tickets()
     print("Import global terminé.")
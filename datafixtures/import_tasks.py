@@ -1,32 +1,17 @@
 """
-Script pour importer les catégories et sous-catégories en base de données
-à partir du fichier categories.json.
+Script pour importer les tâches (semaines et sous-tâches) et les tickets de démonstration
+à partir des fichiers JSON de datafixtures/JSON.
 """
 
-import json
+from datafixtures.importer import import_file
 
-from src.models.task import Task
-from src.models.database import db
-
-TASKS_JSON = "datafixtures/json/task.json"
+TASKS_JSON = "datafixtures/JSON/task.JSON"
+TICKETS_JSON = "datafixtures/JSON/ticket.JSON"
 
 
 def import_tasks() -> None:
-    with open(TASKS_JSON, encoding="utf-8") as fp:
-        data = json.load(fp)
+    import_file("tasks", TASKS_JSON)
+
 
-    for task in data:
-        # Crée la catégorie principale
-        parent = Task.find_by_title(task["title"])
-        if not parent:
-            parent = Task(title=task["title"], content=task["content"], status=False, author_id=task["author"], parent_id=None)
-            db.session.add(parent)
-            db.session.flush()  # Force l'attribution de l'ID
-        # Crée les sous-catégories
-        for sub in task["subtasks"]:
-            subtask = Task.find_by_title(sub["title"])
-            if not subtask:
-                subtask = Task(title=sub["title"], content=sub["content"], status=False, author_id=sub["author"], parent_id=parent.id)
-                db.session.add(subtask)
-    db.session.commit()
-    print(f"{len(data)} tasks ajoutées.")
\ No newline at end of file
+def import_tickets() -> None:
+    import_file("tickets", TICKETS_JSON)
@@ -0,0 +1,324 @@
+"""
+Import en masse des fixtures (utilisateurs, tickets, tâches, messages) depuis un fichier JSON ou NDJSON.
+
+- Le fichier est lu en flux : un tableau JSON est décodé élément par élément (JSONDecoder.raw_decode
+  sur un tampon de CHUNK_SIZE caractères), un fichier NDJSON ligne par ligne. Rien n'est chargé en entier.
+- Les clés uniques déjà en base sont chargées en une requête par type ; les lignes déjà présentes
+  (ou en double dans le fichier) sont ignorées, les autres sont ajoutées. L'import n'ajoute que des
+  lignes (skip-existing) : une ligne existante n'est jamais mise à jour. Relancer un import est sans effet.
+- Les lignes sont écrites par paquets : INSERT multi-lignes, ou COPY sous PostgreSQL, un commit par paquet.
+- Les index dérivés (recherche, compteurs, hiérarchie et avancement des tâches) sont recalculés
+  à la fin.
+
+    python -m datafixtures.importer tasks datafixtures/JSON/task.JSON
+    python -m datafixtures.importer tickets tickets.ndjson --batch-size 5000
+"""
+
+import argparse
+import io
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Iterator
+
+from werkzeug.security import generate_password_hash
+
+from src.models import Message, Task, Ticket, User
+from src.models.database import db
+from src.models.search import rebuild_search_index
+from src.models.ticket_stats import rebuild_ticket_stats
+from src.utils import get_utc_now
+
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 1000
+
+
+# ================================== LECTURE EN FLUX ==================================
+
+
+def iter_records(path: str) -> Iterator[Any]:
+    """Enregistrements d'un fichier : éléments d'un tableau JSON, ou lignes d'un fichier NDJSON."""
+    with open(path, encoding="utf-8") as fp:
+        first = ""
+        while True:
+            char = fp.read(1)
+            if not char or not char.isspace():
+                first = char
+                break
+        fp.seek(0)
+        if first == "[":
+            yield from _iter_json_array(fp)
+        else:
+            for number, line in enumerate(fp, start=1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"{path}, ligne {number} : {e}") from e
+
+
+def _iter_json_array(fp) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    expect = "["  # "[", puis une valeur (ou "]" si vide), puis "," ou "]"
+
+    def read_more() -> None:
+        nonlocal buffer, pos, eof
+        chunk = fp.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("tableau JSON incomplet")
+            read_more()
+            continue
+
+        char = buffer[pos]
+        if expect == "[":
+            if char != "[":
+                raise ValueError("le fichier JSON doit contenir un tableau")
+            pos += 1
+            expect = "first"
+        elif expect in ("first", ",") and char == "]":
+            return
+        elif expect == ",":
+            if char != ",":
+                raise ValueError(f"',' ou ']' attendu, '{char}' trouvé")
+            pos += 1
+            expect = "value"
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                read_more()  # élément coupé par la fin du tampon
+                continue
+            if end == len(buffer) and not eof:
+                read_more()  # un nombre peut se poursuivre dans le paquet suivant
+                continue
+            yield value
+            pos = end
+            expect = ","
+
+
+# ================================== CONVERSIONS ==================================
+
+
+def _optional(value: Any) -> Any:
+    return None if value in (None, "", "NULL", "null") else value
+
+
+def _text(value: Any) -> str:
+    """Texte obligatoire : les marqueurs de valeur absente ("", "NULL"...) deviennent une chaîne vide."""
+    value = _optional(value)
+    return "" if value is None else value
+
+
+def _datetime(value: Any) -> datetime | None:
+    value = _optional(value)
+    if value is None or isinstance(value, datetime):
+        return value
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _int(value: Any) -> int | None:
+    value = _optional(value)
+    return None if value is None else int(value)
+
+
+def _require_id(record: dict, kind: str) -> int:
+    if _optional(record.get("id")) is None:
+        raise ValueError(f"{kind} sans id : {record!r}")
+    return int(record["id"])
+
+
+def user_rows(record: dict) -> Iterator[dict]:
+    yield {
+        "id": _require_id(record, "utilisateur"),
+        "username": record["username"],
+        "email": record["email"],
+        "password_hash": record.get("password_hash") or generate_password_hash(record["password"]),
+        "role": record.get("role") or "user",
+    }
+
+
+def ticket_rows(record: dict) -> Iterator[dict]:
+    created_at = _datetime(record.get("created_at")) or get_utc_now()
+    yield {
+        "id": _require_id(record, "ticket"),
+        "title": record["title"],
+        "content": _text(record.get("content")),
+        "status": _optional(record.get("status")) or "en_attente",
+        "categorie": _optional(record.get("categorie")) or "question",
+        "deadline": _datetime(record.get("deadline")),
+        "created_at": created_at,
+        "updated_at": _datetime(record.get("updated_at")) or created_at,
+        "author_id": int(record["author_id"]),
+        "channel_id": _int(record.get("channel_id")),
+    }
+
+
+def task_rows(record: dict, parent_id: int | None = None) -> Iterator[dict]:
+    """La tâche puis ses sous-tâches imbriquées (parcours explicite, sans récursion Python)."""
+    stack = [(record, parent_id if parent_id is not None else _int(record.get("parent_id")))]
+    while stack:
+        task, parent = stack.pop()
+        task_id = _require_id(task, "tâche")
+        yield {
+            "id": task_id,
+            "title": task["title"],
+            "content": _text(task.get("content")),
+            "status": bool(task.get("status")),
+            "updated_at": get_utc_now(),
+            "subtasks_done": 0,
+            "subtasks_total": 0,
+            "author_id": int(task.get("author_id", task.get("author"))),
+            "assign_id": _int(task.get("assign_id", task.get("assigned"))),
+            "parent_id": parent,
+        }
+        stack.extend((sub, task_id) for sub in reversed(task.get("subtasks") or []))
+
+
+def message_rows(record: dict) -> Iterator[dict]:
+    yield {
+        "id": _require_id(record, "message"),
+        "content": record["content"],
+        "created_at": _datetime(record.get("created_at")) or get_utc_now(),
+        "author_id": int(record["author_id"]),
+        "channel_id": int(record["channel_id"]),
+    }
+
+
+def _after_tasks() -> None:
+    Task.rebuild_closure()
+    Task.rebuild_progress()
+    db.session.commit()
+
+
+def _after_tickets() -> None:
+    rebuild_search_index()
+    rebuild_ticket_stats()
+
+
+# type -> (modèle, colonnes uniques, conversion d'un enregistrement en lignes, recalculs finaux)
+Entity = tuple[Any, tuple[str, ...], Callable[[dict], Iterable[dict]], Callable[[], None] | None]
+ENTITIES: dict[str, Entity] = {
+    "users": (User, ("id", "username", "email"), user_rows, None),
+    "tickets": (Ticket, ("id",), ticket_rows, _after_tickets),
+    "tasks": (Task, ("id",), task_rows, _after_tasks),
+    "messages": (Message, ("id",), message_rows, None),
+}
+
+
+# ================================== ÉCRITURE PAR PAQUETS ==================================
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _write_batch(table, rows: list[dict]) -> None:
+    """Écrit un paquet de lignes : COPY sous PostgreSQL, INSERT multi-lignes ailleurs."""
+    connection = db.session.connection()
+    if connection.dialect.name == "postgresql":
+        columns = list(rows[0])
+        data = io.StringIO("".join(
+            "\t".join(_copy_value(row[c]) for c in columns) + "\n" for row in rows
+        ))
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        with connection.connection.dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY "{table.name}" ({quoted}) FROM STDIN', data)
+    else:
+        db.session.execute(table.insert(), rows)
+
+
+def _reset_sequence(table) -> None:
+    """Les id étant fournis, la séquence PostgreSQL doit repartir après le plus grand id importé."""
+    if db.session.get_bind().dialect.name == "postgresql":
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', 'id'), "
+            f"coalesce((SELECT max(id) FROM \"{table.name}\"), 1))"
+        ))
+        db.session.commit()
+
+
+def import_file(kind: str, path: str, batch_size: int = BATCH_SIZE) -> dict[str, float]:
+    """
+    Importe un fichier de `kind` (users, tickets, tasks, messages) et affiche le débit obtenu.
+    Les lignes dont une clé unique existe déjà sont comptées dans `skipped`, sans être modifiées.
+    """
+    model, unique, to_rows, after = ENTITIES[kind]
+    table = model.__table__
+
+    # toutes les clés existantes en une requête
+    seen: dict[str, set] = {column: set() for column in unique}
+    for values in db.session.execute(db.select(*(table.c[c] for c in unique))):
+        for column, value in zip(unique, values):
+            seen[column].add(value)
+
+    start = time.perf_counter()
+    inserted = skipped = 0
+    batch: list[dict] = []
+    try:
+        for record in iter_records(path):
+            for row in to_rows(record):
+                if any(row[c] in seen[c] for c in unique):
+                    skipped += 1
+                    continue
+                for column in unique:
+                    seen[column].add(row[column])
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    _write_batch(table, batch)
+                    db.session.commit()
+                    inserted += len(batch)
+                    batch = []
+        if batch:
+            _write_batch(table, batch)
+            db.session.commit()
+            inserted += len(batch)
+    except Exception:
+        db.session.rollback()
+        raise
+
+    _reset_sequence(table)
+    if after is not None and inserted:
+        after()
+
+    elapsed = time.perf_counter() - start
+    rate = inserted / elapsed if elapsed else float("inf")
+    print(f"{kind}: {inserted} ajoutée(s), {skipped} déjà présente(s), "
+          f"{elapsed:.2f} s ({rate:.0f} lignes/s)")
+    return {"inserted": inserted, "skipped": skipped, "seconds": elapsed, "rows_per_second": rate}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Import en masse de fixtures JSON / NDJSON "
+                    "(ajout seul : les lignes existantes sont ignorées).")
+    parser.add_argument("kind", choices=sorted(ENTITIES))
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    from app import create_app
+
+    with create_app().app_context():
+        import_file(args.kind, args.path, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,7 @@ from src.models.task import Task
 from src.models.channel import Channel
 from src.models.message import Message
 from src.models.notification import Notification
+from src.models.migrations import upgrade
 
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = db_url
@@ -44,6 +45,8 @@ with app.app_context():
     try:
         db.create_all()
         print("✅ Tables créées avec succès !")
+        applied = upgrade()
+        print(f"✅ Migrations appliquées : {applied or 'aucune'}")
 
         from sqlalchemy import inspect
         inspector = inspect(db.engine)
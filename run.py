@@ -3,6 +3,7 @@
 Script de lancement pour différents environnements.
 Facilite le changement d'environnement pour les étudiants.
 """
+import os
 import sys
 import subprocess
 
@@ -30,7 +31,8 @@ def main():
             "-k",
             "geventwebsocket.gunicorn.workers.GeventWebSocketWorker",
             "-w",
-            "1",
+            # plus d'un worker : définir SOCKETIO_MESSAGE_QUEUE (ex. redis://localhost:6379/0)
+            os.environ.get("WEB_CONCURRENCY", "1"),
             "-b",
             "127.0.0.1:8000",
             "app:app"
@@ -1,34 +1,143 @@
 """API pour l'application."""
 
-from flask import jsonify, request, session
+from flask import current_app, g, jsonify, request, session
 from src.models import Ticket, Notification, Task, Message
-from src.utils import handle_db_errors, login_required
+from src.auth.user_cache import user_cache
+from src.extensions import socketio
+from src.models.ticket_stats import ticket_stats
+from src.socketio.write_queue import message_queue
+from src.utils import (STREAM_FORMATS, conditional_response, handle_db_errors, login_required, parse_id_param,
+                       parse_page_size, stream_query)
 from . import api_bp
 
 
 @api_bp.route("/tickets")
 @handle_db_errors
 def get_ticket():
-    """API pour récupérer les tickets filtrés en JSON."""
+    """
+    API pour récupérer les tickets filtrés en JSON, page par page (curseur `next_cursor`).
+    Avec ?stream=json ou ?stream=ndjson, tous les tickets filtrés sont envoyés en streaming.
+    Répond 304 si les tickets n'ont pas changé depuis la version connue du client (ETag).
+    """
+    count, last_modified = Ticket.data_version()
+    return conditional_response((count, last_modified), last_modified, _tickets_body)
+
+
+def _tickets_body():
+    filters = {
+        "status": request.args.get("status", "all"),
+        "categorie": request.args.get("categorie", "all"),
+        "q": request.args.get("q", "").strip(),
+        "author": request.args.get("author", "").strip(),
+        "sort": request.args.get("sort", "recent"),
+    }
+
+    stream = request.args.get("stream")
+    if stream in STREAM_FORMATS:
+        return stream_query(Ticket.search(**filters), Ticket.to_dict, stream,
+                            current_app.config["STREAM_CHUNK_SIZE"])
+    limit = parse_page_size(request.args.get("limit"),
+                            current_app.config["TICKETS_PAGE_SIZE"],
+                            current_app.config["TICKETS_MAX_PAGE_SIZE"])
+
+    try:
+        tickets, next_cursor = Ticket.find_page(cursor=request.args.get("cursor"), limit=limit, **filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "tickets": [ticket.to_dict() for ticket in tickets],
+        "next_cursor": next_cursor,
+    }), 200
+
+@api_bp.route("/tickets/stats")
+@handle_db_errors
+def get_ticket_stats():
+    """Compteurs des tickets (statut × catégorie, en retard, par auteur) pour le tableau de bord."""
+    return jsonify(ticket_stats()), 200
+
+@api_bp.route("/metrics")
+@login_required
+def get_metrics():
+    """Métriques internes du processus (file des messages, cache des utilisateurs), pour les admins."""
+    if not user_cache.is_admin(g.user.id):
+        return jsonify({"error": "Accès réservé aux administrateurs"}), 403
+    return jsonify({"message_queue": message_queue.metrics(), "user_cache": user_cache.metrics()}), 200
 
-    tickets = Ticket.find_all()
-    return jsonify([ticket.to_dict() for ticket in tickets]), 200
 
 @api_bp.route("/tasks")
 @handle_db_errors
 def get_task():
-    """API pour récupérer les tache filtrés en JSON."""
-
-    taches = Task.find_all()
-    return jsonify([tache.to_dict() for tache in taches]), 200
+    """
+    API pour récupérer l'arbre des taches en JSON (?stream=json|ndjson pour un envoi en streaming).
+    ?root_id=<id> limite la réponse au sous-arbre d'une tâche,
+    ?depth=<n> au nombre de niveaux de sous-tâches.
+    """
+    count, last_modified = Task.data_version()
+    return conditional_response((count, last_modified), last_modified, _tasks_body)
+
+
+def _tasks_body():
+    root_id = request.args.get("root_id", type=int)
+    depth = request.args.get("depth", type=int)
+    if depth is not None and depth < 0:
+        return jsonify({"error": "depth doit être positif"}), 400
+
+    stream = request.args.get("stream")
+    if stream in STREAM_FORMATS:
+        if root_id is not None and Task.find_by_id(root_id) is None:
+            return jsonify({"error": "Task non trouvée"}), 404
+        # un arbre par racine, lu par paquets sur la table de fermeture : pas d'arbre complet en mémoire
+        chunk_size = current_app.config["STREAM_CHUNK_SIZE"]
+        trees = Task.iter_trees(root_id=root_id, depth=depth, chunk_size=chunk_size)
+        return stream_query(trees, lambda node: node, stream, chunk_size)
+
+    taches = Task.serialize_tree(root_id=root_id, depth=depth)
+    if taches is None:
+        return jsonify({"error": "Task non trouvée"}), 404
+    return jsonify(taches), 200
 
 
 @api_bp.route("/channel/<int:channel_id>/messages")
 @handle_db_errors
 def get_messages(channel_id):
-    since = request.args.get("since", 0)
-    messages = Message.find_since(channel_id, since)
-    return jsonify([m.to_dict() for m in messages]), 200
+    """
+    Historique d'un channel, par id croissant, page par page (au plus MESSAGES_MAX_PAGE_SIZE messages) :
+    - sans paramètre, ou avec `before`, la page la plus récente (avant `before`) ;
+      `next_cursor` est la valeur de `before` qui charge les messages plus anciens ;
+    - avec `since`, les premiers messages postérieurs à `since` ;
+      `next_since` est la valeur de `since` qui charge la suite.
+    Les curseurs valent None quand il n'y a plus rien à charger.
+    400 si `since`/`before` ne sont pas des entiers.
+    """
+    try:
+        since = parse_id_param(request.args.get("since"), "since")
+        before = parse_id_param(request.args.get("before"), "before")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = parse_page_size(request.args.get("limit"),
+                            current_app.config["MESSAGES_PAGE_SIZE"],
+                            current_app.config["MESSAGES_MAX_PAGE_SIZE"])
+
+    if since is not None:
+        messages = Message.find_since(channel_id, since, before=before, limit=limit + 1, oldest_first=True)
+        newer = len(messages) > limit
+        messages = messages[:limit]
+        return jsonify({
+            "messages": [m.to_dict() for m in messages],
+            "next_cursor": None,
+            "next_since": messages[-1].id if newer else None,
+        }), 200
+
+    messages = Message.find_since(channel_id, 0, before=before, limit=limit + 1)
+    older = len(messages) > limit
+    messages = messages[-limit:]
+
+    return jsonify({
+        "messages": [m.to_dict() for m in messages],
+        "next_cursor": messages[0].id if older else None,
+        "next_since": None,
+    }), 200
 
 @api_bp.route('/session')
 def get_session():
@@ -55,8 +164,10 @@ def get_session():
 @handle_db_errors
 @login_required
 def get_notif_by_user(user_id):
-    notifs = Notification.find_by_user(user_id)
-    return jsonify([notification.to_dict() for notification in notifs]), 200
+    return conditional_response(
+        Notification.data_version(user_id), None,
+        lambda: (jsonify([n.to_dict() for n in Notification.find_by_user(user_id)]), 200),
+    )
 
 @api_bp.route('/notification/unread-counts', methods=['GET'])
 @handle_db_errors
@@ -66,9 +177,9 @@ def unread_notification_counts():
     if not user_id:
         return jsonify({}), 401
 
-    count = Notification.get_notif_count_by_user(user_id)
-
-    return jsonify({"count": count}), 200
+    version = Notification.data_version(user_id)
+    # le nombre de non lues fait partie de la version : rien à recalculer pour la réponse
+    return conditional_response(version, None, lambda: (jsonify({"count": version[1]}), 200))
 
 
 @api_bp.route('/notification/mark-read', methods=['POST'])
@@ -79,8 +190,10 @@ def mark_notification_as_read():
 
     data = request.get_json()
     notif = Notification.find_by_id(data.get('notification_id'))
+    if notif is None or notif.user_id != user_id:
+        return jsonify({'error': 'Notification introuvable'}), 404
 
-    updated = Notification.marke_read(notif)
+    updated = Notification.marke_read(notif.id)
     return jsonify({'updated': updated}), 200
 
 
@@ -96,10 +209,8 @@ def unread_message_counts():
     if not user_id:
         return jsonify({}), 401
 
-    # Messages dont je suis PAS l'auteur et que je n'ai PAS lus
-    count_by_channel = Message.get_unread_counts_by_channel(user_id)
-
-    return jsonify({Ticket.find_by_channel_id(channel_id).id : count for channel_id, count in count_by_channel}), 200
+    # Messages dont je suis PAS l'auteur et que je n'ai PAS lus, regroupés par ticket en une requête
+    return jsonify(Message.get_unread_counts_by_ticket(user_id)), 200
 
 
 # ── Marquer tous les messages d'un ticket comme lus ───────
@@ -115,5 +226,7 @@ def mark_message_as_read():
     ticket = Ticket.find_by_id(data.get('ticket_id'))
 
     count_unread_msgs = Message.mark_channel_as_read(ticket.channel_id, user_id)
+    # les autres onglets du même utilisateur remettent leur badge à zéro
+    socketio.emit("unread_reset", {"ticket_id": ticket.id}, room=f"user_{user_id}")
 
     return jsonify({'marked': count_unread_msgs}), 200
\ No newline at end of file
@@ -136,7 +136,7 @@ def update_profile(user_id: int):
             flash("Veuillez renseigner l'ancien et le nouveau mot de passe.", "danger")
             return redirect(url_for("auth.user_profile", user_id=user_id))
 
-        if not g.user.check_password(current_password):
+        if not profile_user.check_password(current_password):
             flash("Mot de passe actuel invalide.", "danger")
             return redirect(url_for("auth.user_profile", user_id=user_id))
 
@@ -0,0 +1,98 @@
+"""Cache par processus des utilisateurs connectés.
+
+load_logged_in_user et les handlers Socket.IO lisent l'utilisateur de la session à chaque requête
+ou message : on garde un instantané léger (id, username, role) par id, borné en taille (LRU) et
+en durée (TTL). Une modification d'un User (save, rôle, mot de passe) retire son entrée une fois
+le commit fait ; les autres workers la relisent au plus tard après USER_CACHE_TTL secondes.
+Le cache ne sert qu'à l'affichage : les décisions d'autorisation (admin_required, /api/metrics)
+relisent le rôle en base avec is_admin(), pour qu'un admin rétrogradé ou supprimé perde ses droits
+tout de suite sur tous les workers.
+"""
+
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from sqlalchemy import event
+
+from src.models import User
+from src.models.database import after_commit, db
+
+
+class UserSnapshot(NamedTuple):
+    """Ce que les vues et les templates lisent de g.user, sans instance liée à la session SQLAlchemy."""
+
+    id: int
+    username: str
+    role: str
+
+    def is_admin_user(self) -> bool:
+        return self.role == "admin"
+
+
+class UserCache:
+    """Instantanés UserSnapshot par id d'utilisateur, du plus ancien au plus récemment lu."""
+
+    def __init__(self, size: int = 1024, ttl: float = 60.0) -> None:
+        self.size = size
+        self.ttl = ttl
+        self.entries: OrderedDict[int, tuple[float, UserSnapshot]] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def init_app(self, app) -> None:
+        self.size = app.config["USER_CACHE_SIZE"]
+        self.ttl = app.config["USER_CACHE_TTL"]
+        event.listen(User, "after_update", self._on_user_change)
+        event.listen(User, "after_delete", self._on_user_change)
+
+    def get(self, user_id: int) -> UserSnapshot | None:
+        """Instantané de l'utilisateur, lu en base (une requête sur 3 colonnes) s'il manque ou a expiré."""
+        now = time.monotonic()
+        entry = self.entries.get(user_id)
+        if entry is not None and entry[0] > now:
+            self.entries.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return entry[1]
+
+        self.stats["misses"] += 1
+        row = db.session.query(User.id, User.username, User.role).filter(User.id == user_id).first()
+        if row is None:
+            self.entries.pop(user_id, None)
+            return None
+        snapshot = UserSnapshot(*row)
+        self.entries[user_id] = (now + self.ttl, snapshot)
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+        return snapshot
+
+    def is_admin(self, user_id: int) -> bool:
+        """Rôle admin relu en base (jamais depuis le cache) ; retire l'instantané s'il est périmé."""
+        role = db.session.query(User.role).filter(User.id == user_id).scalar()
+        entry = self.entries.get(user_id)
+        if entry is not None and entry[1].role != role:
+            self.invalidate(user_id)
+        return role == "admin"
+
+    def invalidate(self, user_id: int) -> None:
+        if self.entries.pop(user_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def metrics(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "size": len(self.entries),
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0,
+        }
+
+    def _on_user_change(self, mapper, connection, user: User) -> None:
+        user_id = user.id  # lu avant le commit : les attributs sont expirés ensuite
+        after_commit(lambda: self.invalidate(user_id))
+
+
+user_cache = UserCache()
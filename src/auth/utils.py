@@ -2,7 +2,7 @@ from typing import Optional
 
 from flask import g, session
 
-from src.models import User
+from src.auth.user_cache import UserSnapshot, user_cache
 
 
 def load_logged_in_user() -> None:
@@ -11,8 +11,9 @@ def load_logged_in_user() -> None:
         g.user = None
         return
 
-    g.user = User.find_by_id(user_id)
+    # instantané (id, username, role) en cache : pas de requête pour la plupart des requêtes
+    g.user = user_cache.get(user_id)
 
 
-def get_current_user() -> Optional["User"]:
+def get_current_user() -> Optional["UserSnapshot"]:
     return getattr(g, "user", None)
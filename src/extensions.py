@@ -1,5 +1,50 @@
 """crer la connection socketio"""
 
+import weakref
+
 from flask_socketio import SocketIO
+from socketio import Manager
 
 socketio = SocketIO(async_mode='gevent', cors_allowed_origins="*")
+
+
+class LocalPubSubManager(Manager):
+    """
+    Courtier pub/sub en mémoire pour SOCKETIO_MESSAGE_QUEUE="local://" : relie les serveurs Socket.IO
+    d'un même processus (tests, benchmarks) comme Redis relie plusieurs workers. Chaque émission est
+    livrée aux clients du serveur local puis, après un aller-retour JSON comme avec un vrai courtier,
+    à ceux des autres serveurs du même channel. Les accusés de réception (callback) restent locaux.
+    """
+
+    name = "local"
+    _channels: dict[str, weakref.WeakSet] = {}
+
+    def __init__(self, channel: str = "flask-socketio") -> None:
+        super().__init__()
+        self.channel = channel
+        self._channels.setdefault(channel, weakref.WeakSet()).add(self)
+
+    def emit(self, event, data, namespace=None, room=None, skip_sid=None, callback=None, to=None, **kwargs):
+        room = to or room
+        namespace = namespace or "/"
+        super().emit(event, data, namespace, room=room, skip_sid=skip_sid, callback=callback)
+        if kwargs.get("ignore_queue") or callback is not None:
+            return
+        args = self.json.loads(self.json.dumps(list(data) if isinstance(data, tuple) else [data]))
+        for peer in list(self._channels.get(self.channel, ())):
+            if peer is not self and peer.server is not None:
+                peer.emit(event, args[0] if len(args) == 1 else tuple(args), namespace,
+                          room=room, skip_sid=skip_sid, ignore_queue=True)
+
+
+def socketio_queue_options(url: str | None, channel: str) -> dict:
+    """
+    Options de SocketIO.init_app pour la file de messages partagée entre workers :
+    redis://, amqp://, kafka://... (gérées par Flask-SocketIO), local:// pour le courtier en mémoire,
+    rien sans URL (un seul worker).
+    """
+    if not url:
+        return {}
+    if url.startswith("local://"):
+        return {"client_manager": LocalPubSubManager(channel)}
+    return {"message_queue": url, "channel": channel}
@@ -2,7 +2,7 @@
 
 from datetime import date
 from typing import cast
-from src.models.database import db
+from src.models.database import commit_or_flush, db
 from src.utils import get_utc_now
 
 
@@ -45,5 +45,5 @@ class Channel(db.Model):
     def create(cls, **kwargs) -> "Channel":
         ticket = cls(**kwargs)
         db.session.add(ticket)
-        db.session.commit()
+        commit_or_flush()
         return ticket 
\ No newline at end of file
@@ -1,3 +1,77 @@
+from contextlib import contextmanager
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 db = SQLAlchemy()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Regroupe plusieurs écritures des modèles dans une seule transaction.
+
+        with unit_of_work():
+            ticket = Ticket.create(...)
+            ticket.channel = Channel.create(...)
+
+    Dans le bloc, les helpers des modèles (create, save, update...) font un flush au lieu d'un commit :
+    les ids sont attribués mais rien n'est validé avant la sortie du bloc le plus externe, qui commit
+    une seule fois (ou annule tout en cas d'exception). Les blocs imbriqués rejoignent le bloc externe.
+    """
+    session = db.session
+    depth = session.info.get("uow_depth", 0)
+    session.info["uow_depth"] = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            session.commit()
+    except BaseException:
+        if depth == 0:
+            session.rollback()
+        raise
+    finally:
+        session.info["uow_depth"] = depth
+
+
+def commit_or_flush() -> None:
+    """Commit, ou simple flush si l'appel a lieu dans un unit_of_work()."""
+    if db.session.info.get("uow_depth"):
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+def upsert_insert(model):
+    """
+    INSERT du moteur courant acceptant ON CONFLICT (on_conflict_do_update / excluded) :
+    PostgreSQL et SQLite. None pour les autres moteurs, qui passent par UPDATE puis INSERT.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(model)
+
+
+def after_commit(callback) -> None:
+    """
+    Exécute callback() juste après le prochain commit de la session (ex. émettre un événement Socket.IO
+    seulement une fois les données visibles). Abandonné si la transaction est annulée.
+    """
+    db.session.info.setdefault("after_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session) -> None:
+    for callback in session.info.pop("after_commit", []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit(session) -> None:
+    session.info.pop("after_commit", None)
@@ -1,9 +1,10 @@
 """Modèle message pour les conversation"""
 
 from src.utils import get_utc_now
-from sqlalchemy import func
+from sqlalchemy import case, func
+from sqlalchemy.orm import joinedload
 from typing import cast
-from src.models.database import db
+from src.models.database import commit_or_flush, db, upsert_insert
 
 
 class Message(db.Model):
@@ -23,7 +24,9 @@ class Message(db.Model):
     author  = db.relationship("User",    back_populates="messages")
     channel = db.relationship("Channel", back_populates="messages")
 
-    read_statuses = db.relationship('MessageReadStatus', backref='message', lazy='dynamic')
+    __table_args__ = (
+        db.Index("ix_message_channel_id", "channel_id", "id"),
+    )
 
     @classmethod
     def find_by_id(cls, message_id: int) -> "Message | None":
@@ -36,9 +39,20 @@ class Message(db.Model):
         return cast(list[Message], cls.query.filter(Message.channel_id == channel_id).all())
 
     @classmethod
-    def find_since(cls, channel_id: int, since: int) -> list["Message"]:
-        """Retourne les message d'un channel depuis since."""
-        return cast(list[Message], cls.query.filter(Message.channel_id == channel_id, Message.id > since).all())
+    def find_since(cls, channel_id: int, since: int = 0, before: int | None = None,
+                   limit: int | None = None, oldest_first: bool = False) -> list["Message"]:
+        """
+        Retourne les messages d'un channel d'id compris entre since et before (exclus), par id croissant.
+        Avec `limit`, seuls les `limit` plus récents de l'intervalle sont retournés,
+        ou les `limit` plus anciens avec oldest_first (rattrapage après `since`).
+        Parcours de l'index (channel_id, id) dans un sens ou dans l'autre.
+        """
+        query = cls.query.options(joinedload(cls.author)).filter(cls.channel_id == channel_id, cls.id > since)
+        if before is not None:
+            query = query.filter(cls.id < before)
+        if limit is None or oldest_first:
+            return cast(list[Message], query.order_by(cls.id.asc()).limit(limit).all())
+        return cast(list[Message], query.order_by(cls.id.desc()).limit(limit).all()[::-1])
     
     @classmethod
     def find_all(cls) -> list["Message"]:
@@ -47,46 +61,56 @@ class Message(db.Model):
     
     @classmethod
     def get_unread_counts_by_channel(cls, user_id: int) -> list:
-        """Retourne le nombre de messages non lus par channel pour un user."""
+        """
+        Retourne le nombre de messages non lus par channel pour un user : messages des autres
+        postérieurs à son dernier message lu, lus sur l'index (channel_id, id).
+        """
+        watermark = func.coalesce(ChannelReadState.last_read_message_id, 0)
         return (
-            db.session.query(cls.channel_id, func.count(cls.id).label('count'))  # pylint: disable=not-callable
-            .filter(
-                cls.author_id != user_id,
-                ~MessageReadStatus.query.filter(
-                    MessageReadStatus.message_id == cls.id,
-                    MessageReadStatus.user_id == user_id
-                ).exists()
-            )
+            db.session.query(cls.channel_id,
+                             func.count(cls.id).label('count'))  # pylint: disable=not-callable
+            .outerjoin(ChannelReadState, (ChannelReadState.channel_id == cls.channel_id)
+                       & (ChannelReadState.user_id == user_id))
+            .filter(cls.author_id != user_id, cls.id > watermark)
             .group_by(cls.channel_id)
             .all()
         )
     
+    @classmethod
+    def get_unread_counts_by_ticket(cls, user_id: int) -> dict[int, int]:
+        """
+        Nombre de messages non lus par ticket pour un user, en une requête : seuls les channels
+        rattachés à un ticket sont comptés, les tickets sans non lus sont absents du résultat.
+        """
+        from src.models.ticket import Ticket
+
+        watermark = func.coalesce(ChannelReadState.last_read_message_id, 0)
+        rows = (
+            db.session.query(Ticket.id, func.count(cls.id))  # pylint: disable=not-callable
+            .join(cls, cls.channel_id == Ticket.channel_id)
+            .outerjoin(ChannelReadState, (ChannelReadState.channel_id == cls.channel_id)
+                       & (ChannelReadState.user_id == user_id))
+            .filter(cls.author_id != user_id, cls.id > watermark)
+            .group_by(Ticket.id)
+        )
+        return {ticket_id: count for ticket_id, count in rows}
+
     @classmethod
     def mark_channel_as_read(cls, channel_id: int, user_id: int) -> int:
-        """Marque tous les messages non lus d'un channel comme lus pour un user."""
-        
-        # Récupérer les messages non lus de ce channel pour cet user
-        unread_msgs = (
-            cls.query
-            .filter(
-                cls.channel_id == channel_id,
-                cls.author_id != user_id,
-                ~MessageReadStatus.query.filter(
-                    MessageReadStatus.message_id == cls.id,
-                    MessageReadStatus.user_id == user_id
-                ).exists()
+        """Marque tous les messages d'un channel comme lus pour un user et retourne le nombre de non lus."""
+        last_read = ChannelReadState.last_read(user_id, channel_id)
+        unread, last_id = (
+            db.session.query(
+                func.count(cls.id).filter(cls.author_id != user_id),  # pylint: disable=not-callable
+                func.max(cls.id),
             )
-            .all()
+            .filter(cls.channel_id == channel_id, cls.id > last_read)
+            .one()
         )
-
-        # Insérer un read_status pour chaque message non lu
-        for msg in unread_msgs:
-            read_status = MessageReadStatus(message_id=msg.id, user_id=user_id)
-            db.session.add(read_status)
-
-        db.session.commit()
-
-        return len(unread_msgs)
+        if last_id is not None:
+            ChannelReadState.mark_read(user_id, channel_id, last_id)
+        commit_or_flush()
+        return unread
     
     def to_dict(self) -> dict:
         return {
@@ -94,6 +118,7 @@ class Message(db.Model):
             "content": self.content,
             "created_at": self.created_at,
             "author_id": self.author_id,
+            "author": self.author.username if self.author else None,
             "channel_id": self.channel_id
         }
     
@@ -101,18 +126,48 @@ class Message(db.Model):
     def create(cls, **kwargs) -> "Message":
         ticket = cls(**kwargs)
         db.session.add(ticket)
-        db.session.commit()
+        commit_or_flush()
         return ticket 
 
 
-class MessageReadStatus(db.Model):
-    __tablename__ = 'message_read_status'
+class ChannelReadState(db.Model):
+    """Dernier message lu par un user dans un channel : les messages d'id supérieur sont non lus."""
 
-    id         = db.Column(db.Integer, primary_key=True)
-    message_id = db.Column(db.Integer, db.ForeignKey('Message.id'), nullable=False)
-    user_id    = db.Column(db.Integer, db.ForeignKey('User.id'),    nullable=False)
-    read_at    = db.Column(db.DateTime, default=get_utc_now)
+    __tablename__ = "channel_read_state"
 
-    __table_args__ = (
-        db.UniqueConstraint('message_id', 'user_id', name='uq_msg_user'),
-    )
\ No newline at end of file
+    user_id              = db.Column(db.Integer, db.ForeignKey("User.id"),    primary_key=True)
+    channel_id           = db.Column(db.Integer, db.ForeignKey("Channel.id"), primary_key=True)
+    last_read_message_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at           = db.Column(db.DateTime(timezone=True), default=get_utc_now, onupdate=get_utc_now)
+
+    @classmethod
+    def last_read(cls, user_id: int, channel_id: int) -> int:
+        state = db.session.get(cls, (user_id, channel_id))
+        return state.last_read_message_id if state else 0
+
+    @classmethod
+    def mark_read(cls, user_id: int, channel_id: int, message_id: int) -> None:
+        """Avance le marqueur jusqu'à message_id (jamais en arrière), par un UPSERT. Sans commit."""
+        statement = upsert_insert(cls)
+        if statement is not None:
+            statement = statement.values(user_id=user_id, channel_id=channel_id,
+                                         last_read_message_id=message_id, updated_at=get_utc_now())
+            excluded = statement.excluded.last_read_message_id
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=["user_id", "channel_id"],
+                set_={
+                    "last_read_message_id": case((excluded > cls.last_read_message_id, excluded),
+                                                 else_=cls.last_read_message_id),
+                    "updated_at": statement.excluded.updated_at,
+                },
+            ))
+            return
+
+        updated = db.session.execute(
+            db.update(cls)
+            .where(cls.user_id == user_id, cls.channel_id == channel_id,
+                   cls.last_read_message_id < message_id)
+            .values(last_read_message_id=message_id, updated_at=get_utc_now())
+        )
+        if updated.rowcount == 0 and db.session.get(cls, (user_id, channel_id)) is None:
+            db.session.add(cls(user_id=user_id, channel_id=channel_id, last_read_message_id=message_id))
@@ -0,0 +1,201 @@
+"""Migrations versionnées du schéma.
+
+db.create_all() crée les tables manquantes mais ne modifie jamais une table existante :
+les bases déjà en production reçoivent les nouveaux index, colonnes et tables par ces migrations.
+Chaque migration est appliquée une seule fois puis enregistrée dans la table `schema_version`.
+Elles restent idempotentes, car une base neuve créée par create_all() les rejoue toutes.
+
+    flask --app app db-upgrade
+"""
+
+from typing import Callable
+
+from sqlalchemy import inspect, text
+
+from src.models.database import db
+from src.utils import get_utc_now
+
+schema_version = db.Table(
+    "schema_version",
+    db.Column("version", db.Integer, primary_key=True),
+    db.Column("description", db.String(255), nullable=False),
+    db.Column("applied_at", db.DateTime(timezone=True), nullable=False),
+)
+
+MIGRATIONS: list[tuple[int, str, Callable[[], None]]] = []
+
+
+def migration(version: int, description: str):
+    """Enregistre une fonction comme migration numéro `version`."""
+    def register(func: Callable[[], None]) -> Callable[[], None]:
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+
+def applied_versions() -> set[int]:
+    schema_version.create(bind=db.session.connection(), checkfirst=True)
+    return set(db.session.execute(db.select(schema_version.c.version)).scalars())
+
+
+def upgrade() -> list[int]:
+    """Applique les migrations manquantes, dans l'ordre, et retourne leurs numéros."""
+    done = applied_versions()
+    applied = []
+    for version, description, func in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            func()
+            db.session.execute(
+                schema_version.insert().values(version=version, description=description,
+                                               applied_at=get_utc_now())
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+def create_indexes(model, *names: str) -> None:
+    """Crée les index déclarés dans __table_args__ du modèle s'ils n'existent pas encore."""
+    bind = db.session.connection()
+    for index in model.__table__.indexes:
+        if index.name in names:
+            index.create(bind=bind, checkfirst=True)
+
+
+def add_column(model, column_name: str) -> bool:
+    """Ajoute à la table la colonne déclarée dans le modèle si elle manque. Retourne True si ajoutée."""
+    connection = db.session.connection()
+    table = model.__table__
+    if any(c["name"] == column_name for c in inspect(connection).get_columns(table.name)):
+        return False
+    column = table.c[column_name]
+    column_type = column.type.compile(dialect=connection.dialect)
+    connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {column_name} {column_type}'))
+    return True
+
+
+# ================================== MIGRATIONS ==================================
+
+
+@migration(1, "index plein texte des tickets")
+def _search_index() -> None:
+    from src.models.search import rebuild_search_index
+    rebuild_search_index()
+
+
+@migration(2, "index des requêtes fréquentes (tickets, messages, notifications, tâches)")
+def _hot_path_indexes() -> None:
+    from src.models import Message, Notification, Task, Ticket
+
+    create_indexes(Ticket, "ix_ticket_created_id", "ix_ticket_status_created",
+                   "ix_ticket_categorie_created", "ix_ticket_author")
+    create_indexes(Message, "ix_message_channel_id")
+    # modèle MessageReadStatus retiré depuis : même index, créé sur la table si elle existe encore
+    connection = db.session.connection()
+    if inspect(connection).has_table("message_read_status"):
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_read_status_user ON message_read_status (user_id)"
+        ))
+    create_indexes(Notification, "ix_notification_user_read_created")
+    create_indexes(Task, "ix_task_parent", "ix_task_assign")
+
+
+@migration(3, "date de modification des tâches et index pour les GET conditionnels")
+def _updated_at_versions() -> None:
+    from src.models import Task, Ticket
+
+    if add_column(Task, "updated_at"):
+        db.session.execute(db.update(Task).values(updated_at=get_utc_now()))
+    create_indexes(Task, "ix_task_updated")
+    create_indexes(Ticket, "ix_ticket_updated")
+
+
+@migration(4, "index des échéances des tickets (notifications deadline)")
+def _deadline_index() -> None:
+    from src.models import Ticket
+
+    create_indexes(Ticket, "ix_ticket_deadline")
+
+
+@migration(5, "compteurs de tickets du tableau de bord")
+def _ticket_counters() -> None:
+    from src.models.ticket_stats import AuthorTicketCount, TicketCount, rebuild_ticket_stats
+
+    bind = db.session.connection()
+    TicketCount.__table__.create(bind=bind, checkfirst=True)
+    AuthorTicketCount.__table__.create(bind=bind, checkfirst=True)
+    rebuild_ticket_stats()
+
+
+@migration(6, "compteurs d'avancement des tâches (sous-tâches terminées / total)")
+def _task_progress_counters() -> None:
+    from src.models import Task
+
+    added = add_column(Task, "subtasks_done")
+    added = add_column(Task, "subtasks_total") or added
+    if added:
+        Task.rebuild_progress()
+
+
+@migration(7, "table de fermeture de la hiérarchie des tâches")
+def _task_closure() -> None:
+    from src.models.task import Task, TaskClosure
+
+    TaskClosure.__table__.create(bind=db.session.connection(), checkfirst=True)
+    Task.rebuild_closure()
+
+
+@migration(8, "marqueurs de lecture par channel à la place des accusés de lecture par message")
+def _channel_read_state() -> None:
+    from src.models.message import ChannelReadState
+
+    connection = db.session.connection()
+    ChannelReadState.__table__.create(bind=connection, checkfirst=True)
+    if not inspect(connection).has_table("message_read_status"):
+        return
+    # le marqueur est le plus grand message lu du channel (la lecture se fait par channel entier)
+    connection.execute(text(
+        'INSERT INTO channel_read_state (user_id, channel_id, last_read_message_id, updated_at) '
+        'SELECT r.user_id, m.channel_id, max(r.message_id), max(r.read_at) '
+        'FROM message_read_status r JOIN "Message" m ON m.id = r.message_id '
+        'GROUP BY r.user_id, m.channel_id'
+    ))
+    connection.execute(text("DROP TABLE message_read_status"))
+
+
+@migration(9, "index des tickets par channel (non lus par ticket)")
+def _ticket_channel_index() -> None:
+    from src.models import Ticket
+
+    create_indexes(Ticket, "ix_ticket_channel")
+
+
+@migration(10, "bail du planificateur d'échéances et unicité des notifications d'échéance")
+def _deadline_singleton() -> None:
+    from src.models import Notification
+    from src.models.scheduler_lease import SchedulerLease
+
+    connection = db.session.connection()
+    SchedulerLease.__table__.create(bind=connection, checkfirst=True)
+    # doublons déjà envoyés par plusieurs workers : on garde la plus ancienne
+    connection.execute(text(
+        'DELETE FROM "Notification" WHERE type = \'deadline\' AND id NOT IN ('
+        'SELECT min(id) FROM "Notification" WHERE type = \'deadline\' GROUP BY ticket_id, message)'
+    ))
+    create_indexes(Notification, "uq_notification_deadline")
+
+
+@migration(11, "suppression de l'index des accusés de lecture par message")
+def _drop_read_status_index() -> None:
+    # la table message_read_status est remplacée par channel_read_state (migration 8)
+    connection = db.session.connection()
+    inspector = inspect(connection)
+    if inspector.has_table("message_read_status") and any(
+            index["name"] == "ix_read_status_user" for index in inspector.get_indexes("message_read_status")):
+        connection.execute(text("DROP INDEX ix_read_status_user"))
@@ -1,8 +1,9 @@
 """Modèle message pour les notification"""
 
 from typing import cast
+from sqlalchemy import func
 from src.utils import get_utc_now
-from src.models.database import db
+from src.models.database import commit_or_flush, db
 
 class Notification(db.Model):
 
@@ -19,29 +20,51 @@ class Notification(db.Model):
     user   = db.relationship("User", backref="notifications")
     ticket = db.relationship("Ticket", backref="notifications")
 
+    __table_args__ = (
+        db.Index("ix_notification_user_read_created", "user_id", "is_read", "created_at"),
+        # une notification d'échéance n'est envoyée qu'une fois, même si deux planificateurs se croisent
+        db.Index("uq_notification_deadline", "ticket_id", "message", unique=True,
+                 postgresql_where=db.text("type = 'deadline'"), sqlite_where=db.text("type = 'deadline'")),
+    )
+
     @classmethod
     def find_by_user(cls, user_id: int) -> list["Notification"]:
         """Retourne les notif destiner a un user"""
-        return cast(list["Notification"], cls.query.filter_by(user_id=user_id).order_by(cls.created_at.desc()).all())
+        return cast(list["Notification"],
+                    cls.query.filter_by(user_id=user_id).order_by(cls.created_at.desc()).all())
 
     @classmethod
     def marke_all_read(cls, receiver_id) -> list["Notification"]:
         """marque comme lu les notification detiner a user"""
         updated = cls.query.filter_by(user_id=receiver_id, is_read=False).update({'is_read': True})
-        db.session.commit()
+        commit_or_flush()
         return cast(list["Notification"], updated)
 
     @classmethod
     def marke_read(cls, notification_id) -> "Notification | None":
         """marque comme lu une notification"""
         updated = cls.query.filter_by(id=notification_id, is_read=False).update({'is_read': True})
-        db.session.commit()
+        commit_or_flush()
         return cast("Notification | None", updated)
 
+    @classmethod
+    def find_by_id(cls, notification_id: int) -> "Notification | None":
+        """Retourne une notification par son id ou None si elle n'existe pas."""
+        return cast("Notification | None", db.session.get(cls, notification_id))
+
     @classmethod
     def get_notif_count_by_user(cls, receiver_id) -> int:
         return cls.query.filter_by(user_id=receiver_id, is_read=False).count()
 
+    @classmethod
+    def data_version(cls, receiver_id: int) -> tuple:
+        """
+        Version des notifications d'un user : dernière notification reçue et nombre de non lues.
+        Une nouvelle notification change le premier terme, une lecture le second.
+        """
+        last_id = db.session.query(func.max(cls.id)).filter(cls.user_id == receiver_id).scalar()
+        return last_id, cls.get_notif_count_by_user(receiver_id)
+
     def to_dict(self) -> dict:
         return {
             "id": self.id,
@@ -57,7 +80,7 @@ class Notification(db.Model):
     def create(cls, **kwargs) -> "Notification":
         notification = cls(**kwargs)
         db.session.add(notification)
-        db.session.commit()
+        commit_or_flush()
         return notification 
 
     def update(self, **kwargs) -> None:
@@ -69,4 +92,4 @@ class Notification(db.Model):
 
     def save(self) -> None:
         db.session.add(self)
-        db.session.commit() 
\ No newline at end of file
+        commit_or_flush() 
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""Bail d'exclusivité des tâches de fond qui ne doivent tourner que dans un seul processus.
+
+Chaque worker tente régulièrement de prendre ou de renouveler le bail d'une tâche (ex. "deadlines") :
+un UPDATE conditionnel ne réussit que pour le détenteur actuel ou si le bail a expiré. Un seul worker
+est donc actif à la fois, et un autre prend le relais au plus tard `ttl` secondes après sa disparition.
+Fonctionne sur tous les moteurs (pas de verrou consultatif propre à PostgreSQL).
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from src.models.database import db, upsert_insert
+
+
+class SchedulerLease(db.Model):
+    """Détenteur courant du bail d'une tâche de fond, et fin de validité du bail."""
+
+    __tablename__ = "scheduler_lease"
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+
+def acquire_lease(name: str, holder: str, ttl: float, now: datetime) -> bool:
+    """Prend ou renouvelle le bail `name` pour `holder` jusqu'à now + ttl ; False s'il est tenu ailleurs."""
+    expires_at = now + timedelta(seconds=ttl)
+    statement = upsert_insert(SchedulerLease)
+    if statement is not None:
+        db.session.execute(
+            statement.values(name=name, holder=holder, expires_at=now).on_conflict_do_nothing()
+        )
+    elif db.session.get(SchedulerLease, name) is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(SchedulerLease(name=name, holder=holder, expires_at=now))
+        except IntegrityError:
+            pass  # créé au même moment par un autre worker
+
+    result = db.session.execute(
+        db.update(SchedulerLease)
+        .where(SchedulerLease.name == name,
+               or_(SchedulerLease.holder == holder, SchedulerLease.expires_at <= now))
+        .values(holder=holder, expires_at=expires_at)
+    )
+    db.session.commit()
+    return result.rowcount == 1
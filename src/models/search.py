@@ -0,0 +1,125 @@
+"""Index plein texte des tickets (titre + contenu).
+
+SQLite : table virtuelle FTS5 `ticket_fts` dont le rowid est l'id du ticket.
+PostgreSQL : colonne `search_vector` (tsvector) indexée en GIN sur la table Ticket.
+Les autres moteurs retombent sur un ILIKE.
+"""
+
+import re
+
+from sqlalchemy import DDL, Table, bindparam, column, event, func, literal_column, select, table, text
+
+from src.models.database import db
+
+# Alias de la sous-requête de recherche, utilisé par Ticket.find_page pour le tri par pertinence
+SEARCH_ALIAS = "ticket_search"
+
+_FTS_TABLE = "ticket_fts"
+_PG_CONFIG = "french"
+
+_ticket = table("Ticket", column("id"), column("search_vector"))
+
+# Le titre pèse plus que le contenu dans le classement
+_PG_VECTOR = (
+    f"setweight(to_tsvector('{_PG_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{_PG_CONFIG}', coalesce(content, '')), 'B')"
+)
+
+
+def _dialect() -> str:
+    return db.session.get_bind().dialect.name
+
+
+def is_supported() -> bool:
+    return _dialect() in ("sqlite", "postgresql")
+
+
+def _tokens(q: str) -> list[str]:
+    return re.findall(r"\w+", q, re.UNICODE)
+
+
+def match_subquery(q: str):
+    """
+    Retourne une sous-requête (ticket_id, score) des tickets correspondant à `q`,
+    ou None si `q` ne contient aucun mot. Un score plus petit signifie plus pertinent.
+    """
+    tokens = _tokens(q)
+    if not tokens:
+        return None
+
+    if _dialect() == "postgresql":
+        tsquery = func.to_tsquery(_PG_CONFIG, bindparam("search_q", " & ".join(f"{t}:*" for t in tokens)))
+        return (
+            select(_ticket.c.id.label("ticket_id"),
+                   (-func.ts_rank(_ticket.c.search_vector, tsquery)).label("score"))
+            .where(_ticket.c.search_vector.op("@@")(tsquery))
+            .subquery(SEARCH_ALIAS)
+        )
+
+    # Chaque mot est cité (pas d'opérateurs FTS5 venant de l'utilisateur) et cherché en préfixe
+    fts = table(_FTS_TABLE, column("rowid"))
+    match = " ".join('"{}"*'.format(t.replace('"', "")) for t in tokens)
+    return (
+        select(fts.c.rowid.label("ticket_id"), literal_column(f"bm25({_FTS_TABLE}, 2.0, 1.0)").label("score"))
+        .where(literal_column(_FTS_TABLE).op("MATCH")(bindparam("search_q", match)))
+        .subquery(SEARCH_ALIAS)
+    )
+
+
+def index_ticket(ticket) -> None:
+    """Met à jour l'entrée d'index d'un ticket, dans la transaction en cours (sans commit)."""
+    dialect = _dialect()
+    if dialect == "sqlite":
+        db.session.execute(text(f"DELETE FROM {_FTS_TABLE} WHERE rowid = :id"), {"id": ticket.id})
+        db.session.execute(
+            text(f"INSERT INTO {_FTS_TABLE}(rowid, title, content) VALUES (:id, :title, :content)"),
+            {"id": ticket.id, "title": ticket.title, "content": ticket.content},
+        )
+    elif dialect == "postgresql":
+        db.session.execute(text(f'UPDATE "Ticket" SET search_vector = {_PG_VECTOR} WHERE id = :id'),
+                           {"id": ticket.id})
+
+
+def ensure_search_index() -> None:
+    """Crée la structure d'index si elle manque (bases créées avant l'index plein texte)."""
+    dialect = _dialect()
+    if dialect == "sqlite":
+        db.session.execute(text(_SQLITE_CREATE))
+    elif dialect == "postgresql":
+        for statement in _PG_CREATE:
+            db.session.execute(text(statement))
+    db.session.commit()
+
+
+def rebuild_search_index() -> int:
+    """Recalcule l'index de tous les tickets existants et retourne le nombre de tickets indexés."""
+    ensure_search_index()
+    dialect = _dialect()
+    if dialect == "sqlite":
+        db.session.execute(text(f"DELETE FROM {_FTS_TABLE}"))
+        db.session.execute(text(
+            f'INSERT INTO {_FTS_TABLE}(rowid, title, content) SELECT id, title, content FROM "Ticket"'
+        ))
+    elif dialect == "postgresql":
+        db.session.execute(text(f'UPDATE "Ticket" SET search_vector = {_PG_VECTOR}'))
+    db.session.commit()
+    return db.session.execute(text('SELECT count(*) FROM "Ticket"')).scalar_one()
+
+
+_SQLITE_CREATE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {_FTS_TABLE} "
+    "USING fts5(title, content, tokenize='unicode61 remove_diacritics 2')"
+)
+_PG_CREATE = (
+    'ALTER TABLE "Ticket" ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    'CREATE INDEX IF NOT EXISTS ix_ticket_search_vector ON "Ticket" USING GIN (search_vector)',
+)
+
+
+def attach_ddl(ticket_table: Table) -> None:
+    """Fait créer/supprimer l'index par db.create_all() / db.drop_all() (init-db, fixtures, tests)."""
+    event.listen(ticket_table, "after_create", DDL(_SQLITE_CREATE).execute_if(dialect="sqlite"))
+    for statement in _PG_CREATE:
+        event.listen(ticket_table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    event.listen(ticket_table, "before_drop",
+                 DDL(f"DROP TABLE IF EXISTS {_FTS_TABLE}").execute_if(dialect="sqlite"))
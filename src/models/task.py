@@ -1,7 +1,27 @@
 ﻿"""Modèle Task pour les taches du planning."""
 
 from typing import Any, cast, Optional
-from src.models.database import db
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+from src.models.database import commit_or_flush, db
+from src.utils import get_utc_now
+
+
+class TaskClosure(db.Model):
+    """
+    Table de fermeture de la hiérarchie des tâches : une ligne (ancêtre, descendant, profondeur) par paire,
+    y compris (tâche, tâche, 0). Sous-arbres et ancêtres se lisent en une requête indexée.
+    """
+
+    __tablename__ = "task_closure"
+
+    ancestor_id = db.Column(db.Integer, db.ForeignKey("Task.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = db.Column(db.Integer, db.ForeignKey("Task.id", ondelete="CASCADE"), primary_key=True)
+    depth = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_task_closure_descendant", "descendant_id", "depth"),
+    )
 
 
 class Task(db.Model):
@@ -13,6 +33,11 @@ class Task(db.Model):
     title = db.Column(db.String(150), nullable=False)
     content = db.Column(db.Text, nullable=False)
     status = db.Column(db.Boolean, default=False, nullable=False)
+    updated_at = db.Column(db.DateTime(timezone=True), default=get_utc_now, nullable=True)
+
+    # Avancement dénormalisé : sous-tâches directes terminées / total, tenus à jour à chaque écriture
+    subtasks_done = db.Column(db.Integer, default=0, nullable=False)
+    subtasks_total = db.Column(db.Integer, default=0, nullable=False)
 
     author_id = db.Column(db.Integer, db.ForeignKey("User.id"), nullable=False)
     assign_id = db.Column(db.Integer, db.ForeignKey("User.id"), nullable=True)
@@ -31,10 +56,20 @@ class Task(db.Model):
         back_populates="work"
     )
 
+    __table_args__ = (
+        db.Index("ix_task_parent", "parent_id"),
+        db.Index("ix_task_assign", "assign_id"),
+        db.Index("ix_task_updated", "updated_at"),
+    )
+
     def __repr__(self) -> str:
         return f"<Task {self.title} (status:{self.status})>"
 
     def to_dict(self) -> dict[str, Any]:
+        """Sérialise la tâche et toutes ses sous-tâches (une seule requête, voir serialize_tree)."""
+        return self.serialize_tree(root_id=self.id)[0]
+
+    def _node_dict(self, parent_title: str | None) -> dict[str, Any]:
         return {
             "id": self.id,
             "title": self.title,
@@ -43,46 +78,307 @@ class Task(db.Model):
             "author": self.author_id,
             "assigned": self.assign_id, 
             "parent_id": self.parent_id,
-            "parent_title": self.parent.title if self.parent else None,
-            "subtasks": [s.to_dict() for s in self.subtasks] if self.subtasks else []
+            "parent_title": parent_title,
+            "subtasks_done": self.subtasks_done,
+            "subtasks_total": self.subtasks_total,
+            "subtasks": [],
         }
 
     @classmethod
-    def create_Task(cls, title: str, content: str, user_id: int, assigned_id: int=None, parent_id : int=None) -> "Task":
-        task = cls(title=title, content=content, status=False, author_id=user_id, assign_id=assigned_id, parent_id=parent_id)
+    def serialize_tree(cls, root_id: int | None = None,
+                       depth: int | None = None) -> list[dict[str, Any]] | None:
+        """
+        Sérialise l'arbre des tâches (toutes les semaines, ou le sous-arbre de `root_id`) en O(n) :
+        une requête (la table de fermeture pour un sous-arbre), puis imbrication en mémoire
+        par un parcours en largeur, sans récursion.
+        `depth` limite le nombre de niveaux de sous-tâches (0 : racines seules) ; une tâche coupée
+        garde `subtasks_total` pour indiquer qu'elle a des enfants. Retourne None si `root_id` n'existe pas.
+        """
+        if root_id is None:
+            roots, children = cls.load_tree()
+            result = [root._node_dict(None) for root in roots]
+        else:
+            # seul le sous-arbre (limité à `depth`) est lu, par la table de fermeture
+            root = db.session.get(cls, root_id)
+            if root is None:
+                return None
+            roots, children = [root], {}
+            for task in cls.find_descendants(root_id, max_depth=depth):
+                children.setdefault(task.parent_id, []).append(task)
+            result = [root._node_dict(root.parent.title if root.parent_id else None)]
+
+        level = list(zip(roots, result))
+        current_depth = 0
+        while level and (depth is None or current_depth < depth):
+            next_level = []
+            for task, node in level:
+                for child in children.get(task.id, []):
+                    child_node = child._node_dict(task.title)
+                    node["subtasks"].append(child_node)
+                    next_level.append((child, child_node))
+            level = next_level
+            current_depth += 1
+        return result
+
+    @classmethod
+    def iter_trees(cls, root_id: int | None = None, depth: int | None = None, chunk_size: int = 500):
+        """
+        Même résultat que serialize_tree, mais produit un arbre racine par racine pour le streaming :
+        une seule requête sur la table de fermeture (racine, profondeur, id), lue par paquets (yield_per).
+        Seul l'arbre en cours d'assemblage est gardé en mémoire.
+        """
+        parent = aliased(cls)
+        query = (
+            db.session.query(TaskClosure.ancestor_id, cls, parent.title)
+            .join(cls, cls.id == TaskClosure.descendant_id)
+            .outerjoin(parent, parent.id == cls.parent_id)
+        )
+        if root_id is None:
+            roots = db.select(cls.id).where(cls.parent_id.is_(None))
+            query = query.filter(TaskClosure.ancestor_id.in_(roots))
+        else:
+            query = query.filter(TaskClosure.ancestor_id == root_id)
+        if depth is not None:
+            query = query.filter(TaskClosure.depth <= depth)
+        query = query.order_by(TaskClosure.ancestor_id, TaskClosure.depth, cls.id)
+
+        current_root, tree, nodes = None, None, {}
+        for ancestor_id, task, parent_title in query.yield_per(chunk_size):
+            if ancestor_id != current_root:
+                if tree is not None:
+                    yield tree
+                current_root, nodes = ancestor_id, {}
+                tree = nodes[task.id] = task._node_dict(parent_title)
+                continue
+            nodes[task.id] = task._node_dict(parent_title)
+            nodes[task.parent_id]["subtasks"].append(nodes[task.id])
+        if tree is not None:
+            yield tree
+
+    @classmethod
+    def create_Task(cls, title: str, content: str, user_id: int, assigned_id: int=None,
+                    parent_id : int=None) -> "Task":
+        task = cls(title=title, content=content, status=False, author_id=user_id, assign_id=assigned_id,
+                   parent_id=parent_id)
         db.session.add(task)
         db.session.flush()
-        db.session.commit()
+        db.session.execute(db.insert(TaskClosure).values(ancestor_id=task.id, descendant_id=task.id, depth=0))
+        cls._link_subtree(task.id, task.parent_id)
+        cls.propagate_progress(task.parent_id, done_delta=0, total_delta=1)
+        commit_or_flush()
         return task
     
     def delete_Task(self) -> None:
+        parent_id, done = self.parent_id, self.status
+        # les sous-tâches deviennent des racines (parent_id à NULL) :
+        # leurs sous-arbres ne sont plus reliés aux ancêtres
+        self._unlink_subtree()
+        db.session.execute(db.delete(TaskClosure).where(
+            (TaskClosure.descendant_id == self.id) | (TaskClosure.ancestor_id == self.id)
+        ))
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
+        # la liste des sous-tâches du parent change (updated_at mis à jour par la propagation)
+        self.propagate_progress(parent_id, done_delta=-1 if done else 0, total_delta=-1)
+        commit_or_flush()
 
-    def update_status(self, status_up: bool) -> None:
+    def update_status(self, status_up: bool) -> list[dict[str, Any]]:
+        """Change le statut puis met à jour l'avancement des ancêtres ; retourne les ancêtres modifiés."""
+        previous = bool(self.status)
         if hasattr(self, "status"):
             setattr(self, "status", status_up)
+        self.updated_at = get_utc_now()
         db.session.add(self)
-        db.session.commit()
-    
+        db.session.flush()
+        changed = []
+        if bool(status_up) != previous:
+            changed = self.propagate_progress(self.parent_id, done_delta=1 if status_up else -1,
+                                              total_delta=0)
+        commit_or_flush()
+        return changed
+
+    @classmethod
+    def propagate_progress(cls, parent_id: int | None, done_delta: int,
+                           total_delta: int) -> list[dict[str, Any]]:
+        """
+        Applique la variation des compteurs au parent par un UPDATE atomique (count = count + delta),
+        puis remonte tant que le statut d'un ancêtre bascule (terminé quand toutes ses sous-tâches
+        le sont).
+        Pas de commit. Retourne {id, status, subtasks_done, subtasks_total} de chaque ancêtre modifié.
+        """
+        changed = []
+        while parent_id is not None and (done_delta or total_delta):
+            row = db.session.execute(
+                db.update(cls)
+                .where(cls.id == parent_id)
+                .values(subtasks_done=cls.subtasks_done + done_delta,
+                        subtasks_total=cls.subtasks_total + total_delta,
+                        updated_at=get_utc_now())
+                .returning(cls.parent_id, cls.status, cls.subtasks_done, cls.subtasks_total)
+                .execution_options(synchronize_session="fetch")
+            ).one()
+            complete = row.subtasks_total > 0 and row.subtasks_done == row.subtasks_total
+            # redevenue une feuille : elle garde son statut
+            flips = row.subtasks_total > 0 and complete != row.status
+            if flips:
+                db.session.execute(
+                    db.update(cls).where(cls.id == parent_id).values(status=complete)
+                    .execution_options(synchronize_session="fetch")
+                )
+            changed.append({"id": parent_id, "status": complete if flips else row.status,
+                            "subtasks_done": row.subtasks_done, "subtasks_total": row.subtasks_total})
+            if not flips:
+                break
+            parent_id, done_delta, total_delta = row.parent_id, 1 if complete else -1, 0
+        return changed
+
+    @classmethod
+    def rebuild_progress(cls) -> None:
+        """Recalcule les compteurs d'avancement de toutes les tâches depuis parent_id (sans commit)."""
+        child = aliased(cls)
+        db.session.execute(
+            db.update(cls).values(
+                subtasks_total=db.select(func.count(child.id))
+                .where(child.parent_id == cls.id).scalar_subquery(),
+                subtasks_done=db.select(func.count(child.id))
+                .where(child.parent_id == cls.id, child.status.is_(True)).scalar_subquery(),
+            ).execution_options(synchronize_session=False)
+        )
+
     def update_assign(self, assign_id: int) -> None:
         if hasattr(self, "assign_id"):
             setattr(self, "assign_id", assign_id)
+        self.updated_at = get_utc_now()
         db.session.add(self)
-        db.session.commit()
+        commit_or_flush()
 
     def update(self, **kwargs) -> None:
+        new_parent_id = kwargs.pop("parent_id", self.parent_id)
+        if new_parent_id != self.parent_id:
+            self._move_to(new_parent_id)
         for key, value in kwargs.items():
             if hasattr(self, key) and key != "id":
                 setattr(self, key, value)
+        self.updated_at = get_utc_now()
         db.session.add(self)
-        db.session.commit()
+        commit_or_flush()
+
+    def _move_to(self, parent_id: int | None) -> None:
+        """Déplace la tâche et son sous-arbre sous `parent_id` (fermeture et avancement). Sans commit."""
+        if parent_id is not None and (parent_id == self.id or self.is_descendant_of(parent_id, self.id)):
+            raise ValueError("Une tâche ne peut pas être déplacée sous l'une de ses sous-tâches")
+
+        self._unlink_subtree()
+
+        old_parent_id, done = self.parent_id, 1 if self.status else 0
+        self.parent_id = parent_id
+        db.session.flush()
+        self._link_subtree(self.id, parent_id)
+        self.propagate_progress(old_parent_id, done_delta=-done, total_delta=-1)
+        self.propagate_progress(parent_id, done_delta=done, total_delta=1)
+
+    def _unlink_subtree(self) -> None:
+        """Supprime les liens de fermeture entre le sous-arbre de la tâche et ses ancêtres. Sans commit."""
+        subtree = db.select(TaskClosure.descendant_id).where(TaskClosure.ancestor_id == self.id)
+        above = db.select(TaskClosure.ancestor_id).where(TaskClosure.descendant_id == self.id,
+                                                         TaskClosure.depth > 0)
+        db.session.execute(db.delete(TaskClosure).where(
+            TaskClosure.descendant_id.in_(subtree), TaskClosure.ancestor_id.in_(above)
+        ))
+
+    @classmethod
+    def _link_subtree(cls, task_id: int, parent_id: int | None) -> None:
+        """Relie chaque tâche du sous-arbre de `task_id` à `parent_id` et à ses ancêtres. Sans commit."""
+        if parent_id is None:
+            return
+        above = db.select(TaskClosure.ancestor_id, TaskClosure.depth).where(
+            TaskClosure.descendant_id == parent_id).subquery()
+        below = db.select(TaskClosure.descendant_id, TaskClosure.depth).where(
+            TaskClosure.ancestor_id == task_id).subquery()
+        db.session.execute(db.insert(TaskClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            db.select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+            .select_from(above.join(below, db.true())),
+        ))
+
+    @classmethod
+    def rebuild_closure(cls) -> None:
+        """Recalcule la table de fermeture depuis parent_id, par une requête récursive (sans commit)."""
+        paths = (
+            db.select(cls.id.label("ancestor_id"), cls.id.label("descendant_id"),
+                      db.literal(0).label("depth"))
+            .cte("paths", recursive=True)
+        )
+        child = aliased(cls)
+        paths = paths.union_all(
+            db.select(paths.c.ancestor_id, child.id, paths.c.depth + 1)
+            .where(child.parent_id == paths.c.descendant_id)
+        )
+        db.session.execute(db.delete(TaskClosure))
+        db.session.execute(db.insert(TaskClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            db.select(paths.c.ancestor_id, paths.c.descendant_id, paths.c.depth),
+        ))
+
+    @classmethod
+    def data_version(cls) -> tuple:
+        """Version des tâches (nombre, dernière modification), lue sur index pour les GET conditionnels."""
+        return tuple(db.session.query(func.count(cls.id), func.max(cls.updated_at)).one())
 
     @classmethod
     def find_all(cls) -> list["Task"]:
         """Retourne la liste de toutes les Task"""
         return cast(list["Task"], cls.query.filter_by(parent_id=None).all())
     
+    @classmethod
+    def load_tree(cls) -> tuple[list["Task"], dict[int, list["Task"]]]:
+        """Charge toutes les tâches en une requête et retourne (racines, sous-tâches par id de parent)."""
+        roots: list[Task] = []
+        children: dict[int, list[Task]] = {}
+        for task in cls.query.order_by(cls.id):
+            if task.parent_id:
+                children.setdefault(task.parent_id, []).append(task)
+            else:
+                roots.append(task)
+        return roots, children
+
+    @classmethod
+    def find_descendants(cls, task_id: int, max_depth: int | None = None) -> list["Task"]:
+        """Retourne les sous-tâches de tous niveaux (jusqu'à max_depth), par niveau puis par id."""
+        query = (
+            cls.query.join(TaskClosure, TaskClosure.descendant_id == cls.id)
+            .filter(TaskClosure.ancestor_id == task_id, TaskClosure.depth > 0)
+        )
+        if max_depth is not None:
+            query = query.filter(TaskClosure.depth <= max_depth)
+        return cast(list["Task"], query.order_by(TaskClosure.depth, cls.id).all())
+
+    @classmethod
+    def find_ancestors(cls, task_id: int) -> list["Task"]:
+        """Retourne les ancêtres d'une tâche, du parent direct jusqu'à la semaine."""
+        return cast(list["Task"], (
+            cls.query.join(TaskClosure, TaskClosure.ancestor_id == cls.id)
+            .filter(TaskClosure.descendant_id == task_id, TaskClosure.depth > 0)
+            .order_by(TaskClosure.depth)
+            .all()
+        ))
+
+    @classmethod
+    def level(cls, task_id: int) -> int:
+        """Profondeur d'une tâche dans l'arbre (0 pour une semaine)."""
+        return db.session.query(func.coalesce(func.max(TaskClosure.depth), 0)).filter(
+            TaskClosure.descendant_id == task_id).scalar()
+
+    @classmethod
+    def is_descendant_of(cls, task_id: int, ancestor_id: int) -> bool:
+        """Vrai si `task_id` est dans le sous-arbre de `ancestor_id` (lui-même exclu)."""
+        return db.session.query(
+            db.select(TaskClosure)
+            .where(TaskClosure.ancestor_id == ancestor_id, TaskClosure.descendant_id == task_id,
+                   TaskClosure.depth > 0)
+            .exists()
+        ).scalar()
+
     @classmethod
     def find_by_id(cls, task_id: int) -> Optional["Task"]:
         """Retourne les tâches créées par un user"""
@@ -109,21 +405,12 @@ class Task(db.Model):
 
 
     @property
-    def completion_count(self) -> int:
-        subtasks = self.find_subtasks_by_parent_id(self.id)
-        if not subtasks:
-            return (1 if self.status else 0,1)
-        completed = sum(1 for s in subtasks if s.status)
-        return (completed, len(subtasks))
+    def completion_count(self) -> tuple[int, int]:
+        if not self.subtasks_total:
+            return (1 if self.status else 0, 1)
+        return (self.subtasks_done, self.subtasks_total)
     
     @property
     def completion_rate(self) -> float:
-        subtasks = self.find_subtasks_by_parent_id(self.id)
-        if not subtasks:
-            if self.status == 1:
-                return 100.0
-            else:
-                return 0.0
-        completed = sum(1 for s in subtasks if s.status)
-        return ((completed / len(subtasks))*100)
-
+        done, total = self.completion_count
+        return (done / total) * 100
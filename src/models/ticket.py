@@ -1,7 +1,13 @@
 """Modèle Ticket pour les tickets du système de gestion."""
 
-from src.models.database import db
-from src.utils import get_utc_now
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import func, tuple_
+from src.models.database import commit_or_flush, db
+from src.models.search import attach_ddl, index_ticket, is_supported, match_subquery
+from src.models.ticket_stats import count_ticket_changes
+from src.models.user import User
+from src.utils import decode_cursor, encode_cursor, get_utc_now
 from typing import cast
 
 
@@ -28,6 +34,18 @@ class Ticket(db.Model):
 
     channel = db.relationship("Channel", back_populates="ticket")
 
+    __table_args__ = (
+        # Liste des tickets : tri par (created_at, id), filtres statut/catégorie + date
+        db.Index("ix_ticket_created_id", "created_at", "id"),
+        db.Index("ix_ticket_status_created", "status", "created_at"),
+        db.Index("ix_ticket_categorie_created", "categorie", "created_at"),
+        db.Index("ix_ticket_author", "author_id"),
+        db.Index("ix_ticket_updated", "updated_at"),
+        # Planificateur des notifications d'échéance : requête par intervalle de dates
+        db.Index("ix_ticket_deadline", "deadline"),
+        db.Index("ix_ticket_channel", "channel_id"),
+    )
+
     def __repr__(self) -> str:
         return f"<Ticket {self.title} (status: {self.status})>"
 
@@ -44,22 +62,153 @@ class Ticket(db.Model):
     @classmethod
     def find_all_by_user(cls, user_id: int) -> list["Ticket"]:
         """Retourne la liste de tous les tickets."""
-        return cast(list[Ticket], cls.query.filter_by(author_id=user_id).order_by(Ticket.created_at.desc()).all())
+        return cast(list[Ticket],
+                    cls.query.filter_by(author_id=user_id).order_by(Ticket.created_at.desc()).all())
     
     @classmethod
     def find_all_by_status(cls, targeted_status: str) -> list["Ticket"]:
         """Retourne la liste de tous les tickets du statuss specifier."""
-        return cast(list[Ticket], cls.query.filter_by(status = targeted_status).order_by(Ticket.created_at.desc()).all())
+        return cast(list[Ticket],
+                    cls.query.filter_by(status = targeted_status).order_by(Ticket.created_at.desc()).all())
     
     @classmethod
     def find_all_by_categorie(cls, targeted_categorie: str) -> list["Ticket"]:
         """Retourne la liste de tous les tickets de la categorie specifier."""
-        return cast(list[Ticket], cls.query.filter_by(categorie = targeted_categorie).order_by(Ticket.created_at.desc()).all())
+        return cast(list[Ticket],
+                    cls.query.filter_by(categorie = targeted_categorie)
+                    .order_by(Ticket.created_at.desc()).all())
     
     @classmethod
     def find_by_channel_id(cls, channel_id: int) -> "Ticket | None":
         """renoie le ticket lier au channel si il exist"""
-        return cast("Ticket | None", cls.query.filter_by(channel_id= channel_id))
+        return cast("Ticket | None", cls.query.filter_by(channel_id=channel_id).first())
+
+    @classmethod
+    def _search(cls, status: str = "all", categorie: str = "all", q: str = "", author: str = "",
+                sort: str = "recent"):
+        """Construit la requête filtrée et retourne (requête, clé de tri, ordre croissant)."""
+        query = cls.query
+
+        if status != "all":
+            query = query.filter(cls.status == status)
+
+        if categorie != "all":
+            query = query.filter(cls.categorie == categorie)
+
+        matches = match_subquery(q) if q and is_supported() else None
+        if matches is not None:
+            query = query.join(matches, matches.c.ticket_id == cls.id)
+        elif q:
+            query = query.filter((cls.title.ilike(f"%{q}%")) | (cls.content.ilike(f"%{q}%")))
+
+        if author:
+            query = query.join(User, User.id == cls.author_id).filter(User.username.ilike(f"%{author}%"))
+
+        if sort == "pertinence" and matches is not None:
+            return query, (matches.c.score, cls.id), True
+        return query, (cls.created_at, cls.id), sort == "oldest"
+
+    @classmethod
+    def search(cls, **filters):
+        """Retourne la requête des tickets filtrés et triés (filtres de find_page), sans l'exécuter."""
+        query, keys, ascending = cls._search(**filters)
+        return query.order_by(*(k.asc() if ascending else k.desc() for k in keys))
+
+    @classmethod
+    def find_page(cls, cursor: str | None = None, limit: int = 20, options: tuple = (),
+                  **filters) -> tuple[list["Ticket"], str | None]:
+        """
+        Retourne une page de tickets filtrés après `cursor` et le curseur de la page suivante.
+        Le curseur porte la clé de tri du dernier ticket, (created_at, id) ou (score, id) pour la
+        pertinence : le coût d'une page ne dépend pas de sa profondeur.
+        `options` reçoit le plan de chargement des relations (joinedload, selectinload...).
+        """
+        query, keys, ascending = cls._search(**filters)
+        query = query.options(*options)
+
+        if cursor:
+            values = decode_cursor(cursor)
+            if values is None or len(values) != 2:
+                raise ValueError("Curseur de pagination invalide")
+            try:
+                first = datetime.fromisoformat(values[0]) if keys[0] is cls.created_at else float(values[0])
+                after = tuple_(first, int(values[1]))
+            except (TypeError, ValueError) as e:
+                raise ValueError("Curseur de pagination invalide") from e
+            query = query.filter(tuple_(*keys) > after if ascending else tuple_(*keys) < after)
+
+        rows = (
+            query.add_columns(keys[0])
+            .order_by(*(k.asc() if ascending else k.desc() for k in keys))
+            .limit(limit + 1)
+            .all()
+        )
+        tickets = [row[0] for row in rows[:limit]]
+        if len(rows) <= limit:
+            return tickets, None
+
+        last_key = rows[limit - 1][1]
+        if isinstance(last_key, datetime):
+            last_key = last_key.isoformat()
+        return tickets, encode_cursor(last_key, tickets[-1].id)
+
+    @classmethod
+    def bulk_update_status(cls, ticket_ids: list[int], status: str) -> list:
+        """
+        Passe les tickets au statut donné en une seule requête UPDATE ... RETURNING et retourne
+        (id, title, author_id, channel_id) des tickets réellement modifiés.
+        Pas de commit : à l'appelant de valider.
+        """
+        # anciens statuts, verrouillés jusqu'au commit, pour tenir les compteurs à jour
+        previous = db.session.execute(
+            db.select(cls.id, cls.status, cls.categorie)
+            .where(cls.id.in_(ticket_ids), cls.status != status)
+            .with_for_update()
+        ).all()
+        if not previous:
+            return []
+
+        statement = (
+            db.update(cls)
+            .where(cls.id.in_([row.id for row in previous]))
+            .values(status=status, updated_at=get_utc_now())
+            .returning(cls.id, cls.title, cls.author_id, cls.channel_id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = db.session.execute(statement).all()
+        count_ticket_changes(
+            [(row.status, row.categorie, -1) for row in previous]
+            + [(status, row.categorie, 1) for row in previous]
+        )
+        return updated
+
+    def participant_ids(self) -> list[int]:
+        """Auteur du ticket puis auteurs des messages de sa discussion, sans doublon, en une requête."""
+        return self.participant_ids_by_ticket([self])[self.id]
+
+    @staticmethod
+    def participant_ids_by_ticket(tickets) -> dict[int, list[int]]:
+        """participant_ids de plusieurs tickets (id, author_id, channel_id), en une seule requête."""
+        from src.models.message import Message
+
+        by_channel = defaultdict(list)
+        channel_ids = {ticket.channel_id for ticket in tickets if ticket.channel_id is not None}
+        if channel_ids:
+            rows = db.session.execute(
+                db.select(Message.channel_id, Message.author_id)
+                .where(Message.channel_id.in_(channel_ids)).distinct()
+            )
+            for channel_id, author_id in rows:
+                by_channel[channel_id].append(author_id)
+        return {
+            ticket.id: list(dict.fromkeys([ticket.author_id, *by_channel.get(ticket.channel_id, ())]))
+            for ticket in tickets
+        }
+
+    @classmethod
+    def data_version(cls) -> tuple:
+        """Version des tickets (nombre, dernière modification), lue sur index pour les GET conditionnels."""
+        return tuple(db.session.query(func.count(cls.id), func.max(cls.updated_at)).one())
 
     def to_dict(self) -> dict:
         return {
@@ -78,16 +227,27 @@ class Ticket(db.Model):
     def create(cls, **kwargs) -> "Ticket":
         ticket = cls(**kwargs)
         db.session.add(ticket)
-        db.session.commit()
-        return ticket 
+        db.session.flush()  # attribue l'id, nécessaire à l'index plein texte
+        index_ticket(ticket)
+        count_ticket_changes([(ticket.status, ticket.categorie, 1)], {ticket.author_id: 1})
+        commit_or_flush()
+        return ticket
 
     def update(self, **kwargs) -> None:
+        previous = (self.status, self.categorie)
         for key, value in kwargs.items():
             if hasattr(self, key) and key != "id":
                 setattr(self, key, value)
         self.updated_at = get_utc_now()
+        if (self.status, self.categorie) != previous:
+            count_ticket_changes([(*previous, -1), (self.status, self.categorie, 1)])
         self.save()
 
     def save(self) -> None:
         db.session.add(self)
-        db.session.commit()
\ No newline at end of file
+        db.session.flush()
+        index_ticket(self)
+        commit_or_flush()
+
+
+attach_ddl(Ticket.__table__)
@@ -0,0 +1,139 @@
+"""Compteurs de tickets tenus à jour à chaque écriture (tableau de bord, barre de navigation).
+
+Les compteurs sont modifiés dans la même transaction que le ticket par Ticket.create,
+Ticket.update et Ticket.bulk_update_status, avec un UPSERT atomique `count = count + delta`.
+`rebuild_ticket_stats()` les recalcule depuis la table Ticket pour corriger une dérive
+(écriture SQL directe, import...) :
+
+    flask --app app stats-rebuild
+"""
+
+from sqlalchemy import func
+
+from src.models.database import db, upsert_insert
+
+
+class TicketCount(db.Model):
+    """Nombre de tickets par couple (statut, catégorie)."""
+
+    __tablename__ = "ticket_count"
+
+    status = db.Column(db.String(20), primary_key=True)
+    categorie = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class AuthorTicketCount(db.Model):
+    """Nombre de tickets créés par auteur."""
+
+    __tablename__ = "author_ticket_count"
+
+    author_id = db.Column(db.Integer, db.ForeignKey("User.id"), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _upsert_add(model, rows: list[dict]) -> None:
+    """Ajoute `count` de chaque ligne au compteur existant, ou crée le compteur."""
+    rows = [row for row in rows if row["count"]]
+    if not rows:
+        return
+
+    statement = upsert_insert(model)
+    if statement is not None:
+        statement = statement.on_conflict_do_update(
+            index_elements=[c.name for c in model.__table__.primary_key],
+            set_={"count": model.count + statement.excluded.count},
+        )
+        db.session.execute(statement, rows)
+        return
+
+    # Autres moteurs : UPDATE puis INSERT si le compteur n'existe pas encore
+    keys = [c.name for c in model.__table__.primary_key]
+    for row in rows:
+        where = [getattr(model, k) == row[k] for k in keys]
+        result = db.session.execute(db.update(model).where(*where).values(count=model.count + row["count"]))
+        if result.rowcount == 0:
+            db.session.execute(db.insert(model).values(**row))
+
+
+def count_ticket_changes(changes: list[tuple[str, str, int]], authors: dict[int, int] | None = None) -> None:
+    """
+    Applique des variations de compteurs, sans commit :
+    `changes` est une liste de (statut, catégorie, +1/-1), `authors` un dict {author_id: variation}.
+    """
+    by_key: dict[tuple[str, str], int] = {}
+    for status, categorie, delta in changes:
+        by_key[(status, categorie)] = by_key.get((status, categorie), 0) + delta
+    _upsert_add(TicketCount, [
+        {"status": status, "categorie": categorie, "count": delta}
+        for (status, categorie), delta in by_key.items()
+    ])
+    _upsert_add(AuthorTicketCount, [
+        {"author_id": author_id, "count": delta} for author_id, delta in (authors or {}).items()
+    ])
+
+
+def rebuild_ticket_stats() -> int:
+    """Recalcule tous les compteurs depuis la table Ticket et retourne le nombre de tickets comptés."""
+    from src.models.ticket import Ticket
+
+    db.session.execute(db.delete(TicketCount))
+    db.session.execute(db.delete(AuthorTicketCount))
+    db.session.execute(
+        db.insert(TicketCount).from_select(
+            ["status", "categorie", "count"],
+            db.select(Ticket.status, Ticket.categorie, func.count())
+            .group_by(Ticket.status, Ticket.categorie),
+        )
+    )
+    db.session.execute(
+        db.insert(AuthorTicketCount).from_select(
+            ["author_id", "count"],
+            db.select(Ticket.author_id, func.count()).group_by(Ticket.author_id),
+        )
+    )
+    db.session.commit()
+    return db.session.query(func.coalesce(func.sum(TicketCount.count), 0)).scalar()
+
+
+def ticket_stats(top_authors: int = 10) -> dict:
+    """Agrégats du tableau de bord, lus dans les compteurs (et sur ix_ticket_deadline pour les retards)."""
+    from src.models.ticket import Ticket
+    from src.models.user import User
+    from src.utils import get_utc_now
+
+    by_status: dict[str, dict[str, int]] = {}
+    by_categorie: dict[str, int] = {}
+    total = 0
+    for row in db.session.query(TicketCount).filter(TicketCount.count > 0):
+        by_status.setdefault(row.status, {})[row.categorie] = row.count
+        by_categorie[row.categorie] = by_categorie.get(row.categorie, 0) + row.count
+        total += row.count
+
+    # Le retard dépend de l'heure : compté à la lecture, mais seulement sur les tickets échus
+    overdue = (
+        db.session.query(func.count(Ticket.id))
+        .filter(Ticket.deadline < get_utc_now(), Ticket.status != "resolu")
+        .scalar()
+    )
+
+    authors = (
+        db.session.query(AuthorTicketCount.author_id, User.username, AuthorTicketCount.count)
+        .join(User, User.id == AuthorTicketCount.author_id)
+        .filter(AuthorTicketCount.count > 0)
+        .order_by(AuthorTicketCount.count.desc(), AuthorTicketCount.author_id)
+        .limit(top_authors)
+        .all()
+    )
+
+    return {
+        "total": total,
+        "by_status": {status: sum(counts.values()) for status, counts in by_status.items()},
+        "by_categorie": by_categorie,
+        "by_status_categorie": by_status,
+        "overdue": overdue,
+        "by_author": [
+            {"author_id": author_id, "username": username, "count": count}
+            for author_id, username, count in authors
+        ],
+    }
@@ -2,7 +2,7 @@
 
 from typing import Any, cast
 from werkzeug.security import check_password_hash, generate_password_hash
-from src.models.database import db
+from src.models.database import commit_or_flush, db
 
 
 class User(db.Model):
@@ -70,7 +70,7 @@ class User(db.Model):
 
     def save(self) -> None:
         db.session.add(self)
-        db.session.commit()
+        commit_or_flush()
 
     def is_admin_user(self) -> bool:
         return self.role == "admin"
@@ -83,5 +83,5 @@ class User(db.Model):
                     password_hash = generate_password_hash(password),
                     role=role)
         db.session.add(user)
-        db.session.commit()
+        commit_or_flush()
         return user
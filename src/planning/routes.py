@@ -2,58 +2,64 @@
 
 from flask import jsonify, request, g, render_template, flash
 from src.models import Task, User
+from src.models.database import db
+from src.models.task import TaskClosure
 from src.utils import login_required, admin_required
 from . import plan_bp
 
 
+def assignees_by_task(tasks: list[Task]) -> dict[int, str]:
+    """
+    Noms des personnes assignées, par tâche : celles de ses descendants pour une tâche qui a
+    des sous-tâches, la sienne pour une feuille. Une seule requête sur la table de fermeture,
+    quel que soit le nombre de tâches.
+    """
+    if not tasks:
+        return {}
+    rows = (
+        db.session.query(TaskClosure.ancestor_id, TaskClosure.depth, User.username)
+        .join(Task, Task.id == TaskClosure.descendant_id)
+        .join(User, User.id == Task.assign_id)
+        .filter(TaskClosure.ancestor_id.in_([t.id for t in tasks]))
+        .distinct()
+        .all()
+    )
+    has_subtasks = {t.id: t.subtasks_total > 0 for t in tasks}
+    names: dict[int, set[str]] = {}
+    for task_id, depth, username in rows:
+        # une tâche avec sous-tâches affiche leurs assignés, pas le sien
+        if (depth > 0) == has_subtasks[task_id]:
+            names.setdefault(task_id, set()).add(username)
+    return {task_id: ", ".join(sorted(usernames)) for task_id, usernames in names.items()}
+
+
 @plan_bp.route("/")
 def see_planning():
-    all_tasks = Task.query.all()
-    
-    children_by_parent = {}
-    for task in all_tasks:
-        if task.parent_id:
-            children_by_parent.setdefault(task.parent_id, []).append(task)
-    
-    parent_tasks = [t for t in all_tasks if not t.parent_id]
-    
-    # fonction récursive à l'intérieur car sinon il faudrait mettre le dic children_by_parnet dans les paramêtre et ça risque de prendre de la place
-    def get_descendant_assigns(task_id):
-        assigns = set()
-        for child in children_by_parent.get(task_id, []):
-            if child.assign_id:
-                assigns.add(child.assign_id)
-            assigns.update(get_descendant_assigns(child.id))
-        return assigns
-    
-    all_assign_ids = set()#pour voir tout les utlisateurs qui sont assigné à une tache
-    task_assigns = {}#dictionnare qui stocke l'id de la tache et l'id des assigné de ces sous taches  ou de lui même si pas d'enfants
-    
-    #assign des enfants et lui même si pas enfants
-    for task in all_tasks:
-        descendant_assigns = get_descendant_assigns(task.id)
-        task_assigns[task.id] = descendant_assigns
-        all_assign_ids.update(descendant_assigns)
-        if task.assign_id:
-            all_assign_ids.add(task.assign_id)
-
-    # Charger les users
-    if all_assign_ids:
-        users = {u.id: u.username for u in User.query.filter(User.id.in_(all_assign_ids)).all()}
-    else:
-        users = {}
-    
-    personnes = {}
-    
-    for task in all_tasks:
-        # Si c'est une tâche avec des enfants
-        if task.id in task_assigns and task_assigns[task.id]:
-            personnes[task.id] = ", ".join(users[aid] for aid in task_assigns[task.id] if aid in users)
-        # Si c'est une tâche feuille (assignée directement)
-        elif task.assign_id and task.assign_id in users:
-            personnes[task.id] = users[task.assign_id]
-    
-    return render_template("planning.html", planning=parent_tasks, personnes=personnes)
+    # Seules les semaines sont rendues ; les niveaux suivants sont chargés à l'ouverture (children)
+    semaines = Task.query.filter_by(parent_id=None).order_by(Task.id).all()
+    return render_template("planning.html", planning=semaines, personnes=assignees_by_task(semaines))
+
+
+@plan_bp.route("/<int:task_id>/children")
+def children(task_id: int):
+    """
+    Sous-tâches directes d'une tâche avec leurs compteurs d'avancement :
+    fragment HTML pour le planning, ou JSON avec ?format=json.
+    """
+    task = Task.find_by_id(task_id)
+    if task is None:
+        return jsonify({"success": False, "error": "Task non trouvée"}), 404
+
+    subtasks = Task.find_descendants(task_id, max_depth=1)
+    personnes = assignees_by_task(subtasks)
+    if request.args.get("format") == "json":
+        return jsonify([
+            {**child._node_dict(task.title), "completion_rate": child.completion_rate,
+             "assigned_names": personnes.get(child.id)}
+            for child in subtasks
+        ]), 200
+    return render_template("task_children.html", tasks=subtasks, personnes=personnes,
+                           depth=Task.level(task_id) + 1)
 
 
 @plan_bp.route("/addTask", methods=["POST"])
@@ -87,16 +93,18 @@ def UpdateTaskStatus(task_id: int):
         flash("la tache n'existe pas", "warning")
         return jsonify({"success": False, "error": "Task non trouvée"}), 404
     data = request.get_json()
-    task.update_status(data["status"])
-    parent = Task.find_parent_by_parent_id(task.parent_id)
-    if parent is not None:
+    # l'avancement des ancêtres est mis à jour côté serveur, le client n'a qu'à réafficher
+    ancestors = task.update_status(data["status"])
+    if task.parent_id is not None:
         return jsonify({
             "success": True,
-            "parent_id": parent.id
+            "parent_id": task.parent_id,
+            "ancestors": ancestors,
             }), 200
     else:
         return jsonify({
-            "success": True
+            "success": True,
+            "ancestors": ancestors,
             }), 200
 
 
@@ -1,17 +1,53 @@
+from collections import defaultdict
+
+from sqlalchemy import insert
+
 from src.models import Notification
+from src.models.database import after_commit, commit_or_flush, db
 from src.extensions import socketio
 
 def send_notification(receiver_id, message, notification_type, ticket_id=None):
-    print(f"[send_notification] émission vers room=user_{receiver_id}, message={message}")
-    Notification.create(
-        user_id=receiver_id,
-        message=message,
-        type=notification_type,
-        ticket_id=ticket_id
-    )
-    socketio.emit(
-        "new_notification",
-        {"message": message, "notification_type": notification_type, "ticket_id": ticket_id},
-        room=f"user_{receiver_id}",
-    )
-    print(f"[send_notification] émis ✓")
\ No newline at end of file
+    """Notification pour un seul destinataire, émise après le commit (voir send_notifications)."""
+    send_notifications([{
+        "receiver_id": receiver_id,
+        "message": message,
+        "notification_type": notification_type,
+        "ticket_id": ticket_id,
+    }])
+
+
+def send_notifications(notifications: list[dict]) -> None:
+    """
+    Enregistre des notifications ({"receiver_id", "message", "notification_type", "ticket_id"}, doublons
+    ignorés) en un seul INSERT multi-lignes, puis, une fois le commit fait, émet l'événement
+    `new_notifications` avec la liste des notifications de chaque user : les rooms user_<id> qui
+    reçoivent la même liste partagent un seul emit. Dans un unit_of_work(), l'insert rejoint la
+    transaction englobante et l'émission attend son commit.
+    """
+    rows = list(dict.fromkeys(
+        (n["receiver_id"], n["message"], n["notification_type"], n.get("ticket_id")) for n in notifications
+    ))
+    if not rows:
+        return
+
+    db.session.execute(insert(Notification), [
+        {"user_id": receiver_id, "message": message, "type": notification_type, "ticket_id": ticket_id}
+        for receiver_id, message, notification_type, ticket_id in rows
+    ])
+
+    by_receiver = defaultdict(list)
+    for receiver_id, message, notification_type, ticket_id in rows:
+        by_receiver[receiver_id].append(
+            {"message": message, "notification_type": notification_type, "ticket_id": ticket_id}
+        )
+    by_payload = {}
+    for receiver_id, payloads in by_receiver.items():
+        key = tuple(tuple(p.values()) for p in payloads)
+        by_payload.setdefault(key, (payloads, []))[1].append(f"user_{receiver_id}")
+
+    def emit_by_payload():
+        for payloads, rooms in by_payload.values():
+            socketio.emit("new_notifications", payloads, room=rooms)
+
+    after_commit(emit_by_payload)
+    commit_or_flush()
@@ -1,9 +1,12 @@
 from flask_socketio import emit, join_room
 
-from flask import  session
+from flask import request, session
 from src.extensions import socketio
-from src.models import User
-from src.models.message import Message
+from src.auth.user_cache import user_cache
+from src.models import Ticket
+from src.models.database import db
+from src.socketio.notif import USERS_ROOM
+from src.socketio.write_queue import message_queue
 
 @socketio.on("join")
 def on_join(data):
@@ -21,7 +24,7 @@ def on_message(data):
         emit("error_message", {"message": "Vous devez être connecté pour envoyer un message."})
         return
 
-    user = User.find_by_id(user_id)
+    user = user_cache.get(user_id)
     if user is None:
         emit("error_message", {"message": "Utilisateur introuvable."})
         return
@@ -34,16 +37,39 @@ def on_message(data):
     
 
 
-    msg = Message.create(content=content, author_id=user.id, channel_id=int(channel_id))
+    # écrit par lot avec les messages de la même rafale, diffusé par _broadcast une fois l'id attribué
+    message_queue.submit(user.id, int(channel_id), content, author=user.username, sid=request.sid)
 
-    emit(
-        "new_message",
-        {
-            "id": msg.id,
-            "content": msg.content,
-            "author": user.username,
-            "author_id": user.id,
-            "channel_id": int(channel_id),
-        },
-        to=f"channel_{int(channel_id)}",
-    )
\ No newline at end of file
+
+@message_queue.after_flush
+def _broadcast(rows: list[dict]) -> None:
+    """Diffuse les messages d'un lot dans leur ordre d'écriture (l'ordre des ids)."""
+    channel_ids = {row["channel_id"] for row in rows}
+    tickets = dict(
+        db.session.query(Ticket.channel_id, Ticket.id).filter(Ticket.channel_id.in_(channel_ids))
+    )
+    for row in rows:
+        if row["id"] is None:
+            socketio.emit("error_message", {"message": "Le message n'a pas pu être enregistré."},
+                          to=row["sid"])
+            continue
+        socketio.emit(
+            "new_message",
+            {
+                "id": row["id"],
+                "content": row["content"],
+                "author": row["author"],
+                "author_id": row["author_id"],
+                "channel_id": row["channel_id"],
+            },
+            to=f"channel_{row['channel_id']}",
+        )
+        # +1 non lu sur le ticket pour tous les autres utilisateurs (le client ignore ses propres messages)
+        ticket_id = tickets.get(row["channel_id"])
+        if ticket_id is not None:
+            socketio.emit(
+                "unread_delta",
+                {"ticket_id": ticket_id, "channel_id": row["channel_id"], "author_id": row["author_id"],
+                 "delta": 1},
+                to=USERS_ROOM,
+            )
@@ -1,16 +1,23 @@
 """gere les room socketio pour les notification"""
 
-from flask_socketio import join_room
-from flask import session
+from flask_socketio import emit, join_room
+from flask import current_app, session
 from src.extensions import socketio
+from src.models.message import Message
+
+# Room commune à tous les utilisateurs connectés : chacun voit tous les tickets,
+# un nouveau message change donc le compteur de non lus de tous sauf son auteur.
+USERS_ROOM = "users"
 
 @socketio.on("connect")
 def on_connect():
     user_id = session.get("user_id")
-    print(f"[SocketIO] connect → user_id={user_id}") #TODO remove me
     if user_id:
         join_room(f"user_{user_id}")
-        print(f"[SocketIO] joined room user_{user_id}")  #TODO remove me
+        join_room(USERS_ROOM)
+        current_app.logger.debug("Socket.IO : user %s rejoint user_%s et %s", user_id, user_id, USERS_ROOM)
+        # état complet une fois par connexion (et reconnexion), ensuite seulement des deltas
+        emit("unread_counts", Message.get_unread_counts_by_ticket(user_id))
 
 @socketio.on("disconnect")
 def on_disconnect():
@@ -0,0 +1,133 @@
+"""File d'écriture groupée ("group commit") des messages de discussion.
+
+Les événements send_message ne font plus un INSERT et un commit chacun : le message est mis en file
+et une tâche de fond (greenlet sous gevent) écrit les messages arrivés dans la même fenêtre de
+quelques millisecondes en un seul INSERT multi-lignes et un seul commit. Les ids sont attribués par
+cet INSERT, dans l'ordre d'arrivée (donc dans l'ordre de chaque channel), puis la fonction enregistrée
+par @message_queue.after_flush diffuse le lot, une fois le commit fait.
+
+Sans tâche de fond (tests, MESSAGE_WRITE_BEHIND désactivé), chaque message est écrit tout de suite.
+"""
+
+from collections import deque
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.extensions import socketio
+from src.models.database import db
+from src.models.message import Message
+from src.utils import get_utc_now
+
+
+class MessageWriteQueue:
+    """Messages en attente d'écriture, vidés par lots dans l'ordre d'arrivée."""
+
+    def __init__(self) -> None:
+        self.app = None
+        self.pending: deque[dict] = deque()
+        self.started = False
+        self._wakeup = None
+        self._after_flush = None
+        self.stats = {"max_depth": 0, "batches": 0, "messages": 0, "last_batch": 0, "errors": 0}
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.window = app.config["MESSAGE_BATCH_WINDOW"]
+        self.batch_max = app.config["MESSAGE_BATCH_MAX"]
+
+    def after_flush(self, callback):
+        """Enregistre callback(rows), appelé après chaque commit avec les messages écrits du lot."""
+        self._after_flush = callback
+        return callback
+
+    def metrics(self) -> dict:
+        stats = self.stats
+        return {
+            "depth": len(self.pending),
+            **stats,
+            "avg_batch": round(stats["messages"] / stats["batches"], 2) if stats["batches"] else 0,
+        }
+
+    # ------------------------------------------------------------------ écriture
+
+    def submit(self, author_id: int, channel_id: int, content: str, **extra) -> None:
+        """Met un message en file ; `extra` est rendu tel quel à after_flush (auteur, sid...)."""
+        self.pending.append({
+            "author_id": author_id,
+            "channel_id": channel_id,
+            "content": content,
+            "created_at": get_utc_now(),
+            **extra,
+        })
+        self.stats["max_depth"] = max(self.stats["max_depth"], len(self.pending))
+        if self._ensure_started():
+            self._wakeup.set()
+        else:
+            self.flush()
+
+    def flush(self) -> list[dict]:
+        """Écrit le lot en tête de file (au plus MESSAGE_BATCH_MAX messages) et retourne ses lignes."""
+        batch = [self.pending.popleft() for _ in range(min(len(self.pending), self.batch_max))]
+        if not batch:
+            return []
+
+        columns = ("author_id", "channel_id", "content", "created_at")
+        values = [{c: row[c] for c in columns} for row in batch]
+        try:
+            # un seul INSERT multi-lignes : les ids y sont attribués dans l'ordre des VALUES, on les trie
+            # plutôt que de demander sort_by_parameter_order (qui repasse à un INSERT par ligne sous SQLite)
+            ids = sorted(db.session.execute(db.insert(Message).returning(Message.id), values).scalars())
+            db.session.commit()
+        except SQLAlchemyError:
+            # une ligne invalide (channel supprimé...) ne doit pas faire perdre les autres
+            db.session.rollback()
+            ids = [self._insert_one(row) for row in values]
+
+        for row, message_id in zip(batch, ids):
+            row["id"] = message_id
+            if message_id is None:
+                self.stats["errors"] += 1
+        self.stats["batches"] += 1
+        self.stats["messages"] += len(batch)
+        self.stats["last_batch"] = len(batch)
+
+        if self._after_flush is not None:
+            self._after_flush(batch)
+        return batch
+
+    def _insert_one(self, values: dict) -> int | None:
+        try:
+            message_id = db.session.execute(db.insert(Message).returning(Message.id), values).scalar_one()
+            db.session.commit()
+            return message_id
+        except SQLAlchemyError:
+            db.session.rollback()
+            return None
+
+    # ------------------------------------------------------------------ tâche de fond
+
+    def _ensure_started(self) -> bool:
+        if not self.app.config["MESSAGE_WRITE_BEHIND"] or self.app.testing:
+            return False
+        if not self.started:
+            self.started = True
+            self._wakeup = socketio.server.eio.create_event()
+            socketio.start_background_task(self._run)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # laisse arriver les messages de la même rafale avant d'écrire
+            socketio.sleep(self.window)
+            with self.app.app_context():
+                while self.pending:
+                    try:
+                        self.flush()
+                    except Exception:  # pylint: disable=broad-except
+                        self.app.logger.exception("Écriture groupée des messages échouée")
+                db.session.remove()
+
+
+message_queue = MessageWriteQueue()
@@ -0,0 +1,213 @@
+"""Planificateur des notifications d'échéance ("deadline") des tickets.
+
+Une tâche de fond garde un tas (min-heap) des prochaines notifications à envoyer :
+(date d'envoi, ticket, délai avant échéance). Les tickets dont l'échéance approche sont chargés par
+fenêtres successives grâce à une requête par intervalle sur l'index ix_ticket_deadline ; une échéance
+créée ou modifiée par ce processus est ajoutée au tas par un événement SQLAlchemy, celles modifiées
+par les autres workers sont relues toutes les DEADLINE_REFRESH secondes.
+Les entrées périmées (échéance changée, ticket résolu) sont simplement ignorées au moment de l'envoi.
+
+Chaque worker démarre la tâche, mais seul le détenteur du bail "deadlines" (scheduler_lease) envoie ;
+l'index unique uq_notification_deadline garantit en plus qu'une notification ne part qu'une fois.
+"""
+
+import heapq
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from src.extensions import socketio
+from src.models import Notification, Ticket
+from src.models.database import after_commit, db
+from src.models.scheduler_lease import acquire_lease
+from src.service import send_notification
+from src.ticket.utils import to_utc_aware
+from src.utils import get_utc_now
+
+RETRY_DELAY = 5         # secondes avant de réessayer après une erreur, doublées à chaque échec
+MAX_RETRY_DELAY = 300
+
+
+def format_lead(lead: int) -> str:
+    if lead % 86400 == 0:
+        return f"{lead // 86400} j"
+    if lead % 3600 == 0:
+        return f"{lead // 3600} h"
+    return f"{lead // 60} min"
+
+
+def deadline_message(title: str, lead: int) -> str:
+    if lead <= 0:
+        return f"L'échéance du ticket « {title} » est atteinte"
+    return f"Le ticket « {title} » arrive à échéance dans {format_lead(lead)}"
+
+
+class DeadlineScheduler:
+    """Tas des notifications d'échéance à venir, vidé par une tâche de fond (greenlet sous gevent)."""
+
+    def __init__(self) -> None:
+        self.app = None
+        self.heap: list[tuple[datetime, int, int, datetime]] = []
+        self.deadlines: dict[int, datetime | None] = {}  # échéance courante connue par ticket
+        self.loaded_until: datetime | None = None
+        self.refreshed_at: datetime | None = None
+        self.started = False
+        self.holder: str | None = None
+        self._wakeup = None
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.lead_times = sorted(app.config["DEADLINE_LEAD_TIMES"], reverse=True)
+        self.window = timedelta(seconds=app.config["DEADLINE_WINDOW"])
+        self.grace = timedelta(seconds=app.config["DEADLINE_GRACE"])
+        self.refresh = timedelta(seconds=app.config["DEADLINE_REFRESH"])
+        app.before_request(self._ensure_started)
+        event.listen(Ticket, "after_insert", self._on_ticket_change)
+        event.listen(Ticket, "after_update", self._on_ticket_change)
+
+    # ------------------------------------------------------------------ tas
+
+    def schedule(self, ticket_id: int, deadline: datetime | None, now: datetime | None = None) -> None:
+        """(Re)planifie les notifications d'un ticket ; deadline=None les annule."""
+        if self.loaded_until is None:
+            return  # rien n'est chargé : le premier chargement lira l'échéance en base
+        deadline = to_utc_aware(deadline) if deadline else None
+        if self.deadlines.get(ticket_id) == deadline:
+            return
+        self.deadlines[ticket_id] = deadline
+        if deadline is None:
+            return
+
+        now = now or get_utc_now()
+        head = self.heap[0][0] if self.heap else None
+        for lead in self.lead_times:
+            fire_at = deadline - timedelta(seconds=lead)
+            # au-delà de la fenêtre chargée, le prochain chargement s'en chargera
+            if now - self.grace <= fire_at < self.loaded_until:
+                heapq.heappush(self.heap, (fire_at, ticket_id, lead, deadline))
+        if self._wakeup is not None and self.heap and (head is None or self.heap[0][0] < head):
+            self._wakeup.set()
+
+    def load_window(self, now: datetime) -> None:
+        """Charge les tickets dont une notification tombe dans [now - grace, now + window)."""
+        start, end = now - self.grace, now + self.window
+        low = start + timedelta(seconds=min(self.lead_times))
+        high = end + timedelta(seconds=max(self.lead_times))
+        rows = (
+            db.session.query(Ticket.id, Ticket.deadline)
+            .filter(Ticket.deadline >= low, Ticket.deadline < high, Ticket.status != "resolu")
+            .all()
+        )
+        self.loaded_until = end
+        self.refreshed_at = now
+        # on n'oublie que les tickets qui n'ont plus rien dans le tas
+        pending = {ticket_id for _, ticket_id, _, _ in self.heap}
+        self.deadlines = {k: v for k, v in self.deadlines.items() if k in pending}
+        for ticket_id, deadline in rows:
+            self.deadlines.pop(ticket_id, None)
+            self.schedule(ticket_id, deadline, now)
+
+    def run_due(self, now: datetime) -> int:
+        """Envoie les notifications dont la date est passée et retourne leur nombre."""
+        sent = 0
+        while self.heap and self.heap[0][0] <= now:
+            fire_at, ticket_id, lead, deadline = heapq.heappop(self.heap)
+            if self.deadlines.get(ticket_id) != deadline:
+                continue  # échéance modifiée ou annulée depuis la planification
+            try:
+                sent += self._notify(ticket_id, lead, deadline)
+            except Exception:
+                # remise dans le tas : renvoyée à la prochaine itération réussie
+                heapq.heappush(self.heap, (fire_at, ticket_id, lead, deadline))
+                raise
+        return sent
+
+    def _notify(self, ticket_id: int, lead: int, deadline: datetime) -> int:
+        ticket = db.session.get(Ticket, ticket_id)
+        if ticket is None or ticket.status == "resolu" or ticket.deadline is None:
+            return 0
+        if to_utc_aware(ticket.deadline) != deadline:
+            return 0
+
+        message = deadline_message(ticket.title, lead)
+        # déjà envoyée (redémarrage du processus pendant la période de grâce)
+        if Notification.query.filter_by(ticket_id=ticket.id, type="deadline", message=message).first():
+            return 0
+        try:
+            send_notification(
+                receiver_id=ticket.author_id,
+                message=message,
+                notification_type="deadline",
+                ticket_id=ticket.id,
+            )
+        except IntegrityError:
+            # envoyée entre-temps par un autre processus (uq_notification_deadline)
+            db.session.rollback()
+            return 0
+        return 1
+
+    # ------------------------------------------------------------------ tâche de fond
+
+    def tick(self, now: datetime) -> int:
+        """
+        Une itération de la tâche de fond : renouvelle le bail, recharge la fenêtre si besoin
+        puis envoie ce qui est dû. Sans le bail, le tas est vidé et rien n'est envoyé.
+        """
+        lease = self.refresh.total_seconds() * 3
+        if not acquire_lease("deadlines", self.holder, lease, now):
+            self.heap, self.deadlines, self.loaded_until = [], {}, None
+            return 0
+        if self.loaded_until is None or now >= self.loaded_until or now >= self.refreshed_at + self.refresh:
+            self.load_window(now)
+        return self.run_due(now)
+
+    def _on_ticket_change(self, mapper, connection, ticket: Ticket) -> None:
+        if self.loaded_until is None:
+            return
+        # valeurs lues avant le commit : les attributs sont expirés ensuite
+        ticket_id = ticket.id
+        deadline = None if ticket.status == "resolu" else ticket.deadline
+        after_commit(lambda: self.schedule(ticket_id, deadline))
+
+    def _ensure_started(self) -> None:
+        if self.started or not self.app.config["DEADLINE_SCHEDULER_ENABLED"] or self.app.testing:
+            return
+        self.started = True
+        # identifiant calculé dans le worker (après le fork de gunicorn), pas à l'import
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = socketio.server.eio.create_event()
+        socketio.start_background_task(self._run)
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            with self.app.app_context():
+                try:
+                    self.tick(get_utc_now())
+                    failures = 0
+                except Exception:  # pylint: disable=broad-except
+                    # base indisponible... : on réessaie plus tard au lieu de laisser mourir la tâche
+                    failures += 1
+                    self.app.logger.exception("Planificateur des échéances : itération échouée")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            if failures:
+                socketio.sleep(min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY))
+                continue
+
+            # au plus tard au prochain rafraîchissement (ou nouvelle tentative de prise du bail)
+            next_at = get_utc_now() + self.refresh
+            if self.loaded_until is not None and self.loaded_until < next_at:
+                next_at = self.loaded_until
+            if self.heap and self.heap[0][0] < next_at:
+                next_at = self.heap[0][0]
+            self._wakeup.clear()
+            self._wakeup.wait(max((next_at - get_utc_now()).total_seconds(), 0.0))
+
+
+deadline_scheduler = DeadlineScheduler()
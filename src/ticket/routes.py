@@ -1,15 +1,24 @@
 from datetime import timezone
 
-from flask import flash, g, redirect, render_template, request, url_for, jsonify
+from flask import current_app, flash, g, redirect, render_template, request, url_for, jsonify
+from sqlalchemy.orm import joinedload
 
-from src.models import Ticket, User, Channel
-from src.models.database import db
+from src.models import Ticket, Channel
+from src.models.database import db, unit_of_work
 from src.ticket.utils import format_countdown, is_deadline_late, parse_deadline
-from src.utils import get_utc_now, login_required
-from src.service import send_notification
+from src.utils import get_utc_now, login_required, parse_page_size
+from src.service import send_notifications
 
 from . import ticket_bp
 
+ALLOWED_STATUSES = {"en_attente", "en_cours", "resolu"}
+
+# Tout ce que lit manage_tickets.html, chargé en un nombre fixe de requêtes quel que soit le nombre
+# de tickets. Les discussions ne sont plus rendues ici : messagerie.js les charge à l'ouverture.
+MANAGE_PAGE_LOADING = (
+    joinedload(Ticket.author),
+)
+
 
 @ticket_bp.route("/<int:ticket_id>/update_status", methods=["POST"])
 @login_required
@@ -21,24 +30,62 @@ def status_update_ticket(ticket_id: int):
 
     status = request.form.get("status", ticket.status)
 
-    allowed_statuses = {"en_attente", "en_cours", "resolu"}
-    if status not in allowed_statuses:
+    if status not in ALLOWED_STATUSES:
         flash("Statut invalide.", "danger")
         return redirect(url_for("index"))
 
-    ticket.update(status=status)
+    notifications = _status_notifications([ticket], Ticket.participant_ids_by_ticket([ticket]), status)
 
-    send_notification(
-        receiver_id=ticket.author_id,
-        message=f"Votre ticket « {ticket.title} » est {status}",
-        notification_type="statut",
-        ticket_id=ticket.id
-    )
+    with unit_of_work():
+        ticket.update(status=status)
+        send_notifications(notifications)
 
     flash("Ticket mis à jour.", "success")
     return redirect(url_for("ticket.manage_ticket"))
 
 
+def _status_notifications(tickets, participants: dict[int, list[int]], status: str) -> list[dict]:
+    """
+    Notifications de changement de statut : l'auteur et ceux qui ont participé à la discussion
+    de chaque ticket, sauf celui qui fait la modification.
+    """
+    return [
+        {
+            "receiver_id": user_id,
+            "message": f"Le ticket « {ticket.title} » est {status}",
+            "notification_type": "statut",
+            "ticket_id": ticket.id,
+        }
+        for ticket in tickets
+        for user_id in participants[ticket.id]
+        if user_id == ticket.author_id or user_id != g.user.id
+    ]
+
+
+@ticket_bp.route("/bulk_update_status", methods=["POST"])
+@login_required
+def bulk_status_update_ticket():
+    """
+    Change le statut de plusieurs tickets en une requête : {"ticket_ids": [...], "status": "resolu"}.
+    Les participants de chaque ticket sont notifiés comme pour un seul changement de statut : un INSERT
+    pour tout le lot, puis un événement par destinataire après le commit.
+    """
+    data = request.get_json(silent=True) or {}
+    status = data.get("status")
+    ticket_ids = data.get("ticket_ids")
+
+    if status not in ALLOWED_STATUSES:
+        return jsonify({"success": False, "error": "Statut invalide"}), 400
+    if not isinstance(ticket_ids, list) or not all(type(i) is int for i in ticket_ids):
+        return jsonify({"success": False, "error": "ticket_ids doit être une liste d'entiers"}), 400
+
+    with unit_of_work():
+        updated = Ticket.bulk_update_status(ticket_ids, status)
+        send_notifications(_status_notifications(updated, Ticket.participant_ids_by_ticket(updated), status))
+
+    return jsonify({"success": True, "updated": sorted(ticket.id for ticket in updated)}), 200
+
+
 @ticket_bp.route("/new", methods=["GET", "POST"])
 @login_required
 def create_ticket():
@@ -62,11 +109,11 @@ def create_ticket():
             return redirect(url_for("auth.login"))
 
 
-        ticket = Ticket.create(title=title, categorie=categorie, content=content, deadline=deadline, author=g.user)
-
-        channel = Channel.create(name=f"Discussion ticket #{ticket.id}")
-        
-        ticket.update(channel_id = channel.id) # necessaire car on modife le ticket avec l'ajout de la clef etrangere channel _id
+        # Ticket et channel dans une seule transaction : un seul commit, et jamais de ticket sans channel
+        with unit_of_work():
+            ticket = Ticket.create(title=title, categorie=categorie, content=content, deadline=deadline,
+                                   author_id=g.user.id)
+            ticket.channel = Channel.create(name=f"Discussion ticket #{ticket.id}")
 
         flash("Ticket créé avec succès.", "success")
         return redirect(url_for("ticket.manage_ticket"))
@@ -111,41 +158,32 @@ def edit_ticket(ticket_id: int):
 
 @ticket_bp.route("/")
 def manage_ticket():
-    """Affiche la liste des tickets avec filtres, recherche et tri."""
+    """Affiche la liste des tickets avec filtres, recherche plein texte, tri et pagination par curseur."""
     status = request.args.get("status", "all")
     sort = request.args.get("sort", "recent")
     categorie = request.args.get("categorie", "all")
     q = request.args.get("q", "").strip()
     author = request.args.get("author", "").strip()
+    cursor = request.args.get("cursor", "").strip()
+    limit = parse_page_size(request.args.get("limit"),
+                            current_app.config["TICKETS_PAGE_SIZE"],
+                            current_app.config["TICKETS_MAX_PAGE_SIZE"])
 
-    query = Ticket.query.join(User)
-
-    if status != "all":
-        query = query.filter(Ticket.status == status)
-
-    if categorie != "all":
-        query = query.filter(Ticket.categorie == categorie) 
-
-    if q:
-        query = query.filter(
-            (Ticket.title.ilike(f"%{q}%")) | (Ticket.content.ilike(f"%{q}%"))
-        )
-
-    if author:
-        query = query.filter(User.username.ilike(f"%{author}%"))
-
-    if sort == "oldest":
-        query = query.order_by(Ticket.created_at.asc())
-    else:
-        query = query.order_by(Ticket.created_at.desc())
+    filters = {"status": status, "categorie": categorie, "q": q, "author": author, "sort": sort}
 
-    tickets = query.all()
+    try:
+        tickets, next_cursor = Ticket.find_page(cursor=cursor, limit=limit, options=MANAGE_PAGE_LOADING,
+                                                **filters)
+    except ValueError:
+        # Curseur corrompu ou périmé : on repart de la première page
+        tickets, next_cursor = Ticket.find_page(limit=limit, options=MANAGE_PAGE_LOADING, **filters)
 
     now = get_utc_now().astimezone(timezone.utc)
 
     return render_template(
         "manage_tickets.html",
         tickets=tickets,
+        next_cursor=next_cursor,
         current_status=status,
         current_sort=sort,
         current_categorie=categorie,
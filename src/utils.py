@@ -1,6 +1,11 @@
+import base64
+import binascii
+import hashlib
+import json
 from functools import wraps
 from datetime import datetime, timezone
-from flask import flash, g, redirect, url_for, request, jsonify
+from flask import (Response, current_app, flash, g, jsonify, make_response, redirect, request,
+                   stream_with_context, url_for)
 from functools import wraps
 from sqlalchemy.exc import OperationalError, DatabaseError
 import pytz
@@ -24,13 +29,110 @@ def convert_to_local_timzone(utc):
     return utc.astimezone(paris_tz)
 
 
+def encode_cursor(*values) -> str:
+    """Encode les valeurs de la clé de tri du dernier élément d'une page en jeton opaque."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> list | None:
+    """Décode un jeton produit par encode_cursor, None si le jeton est invalide."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def conditional_response(version, last_modified: datetime | None, build) -> Response:
+    """
+    GET conditionnel : l'ETag est dérivé de `version` (valeur peu coûteuse qui change avec les données)
+    et de l'URL demandée. Si le client a déjà cette version, on répond 304 sans appeler `build`,
+    sinon `build()` produit la réponse complète, à laquelle on ajoute ETag et Last-Modified.
+    Seul If-None-Match est pris en compte : la version comprend aussi le nombre de lignes, qu'une
+    suppression change sans faire bouger la date de dernière modification (If-Modified-Since).
+    """
+    etag = hashlib.sha1(repr((version, request.full_path)).encode("utf-8")).hexdigest()
+    if last_modified is not None:
+        # Les dates HTTP sont à la seconde près
+        last_modified = last_modified.replace(microsecond=0)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    not_modified = request.if_none_match.contains(etag)
+    response = Response(status=304) if not_modified else make_response(build())
+    if response.status_code not in (200, 304):
+        return response
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Le navigateur garde la réponse mais doit revalider à chaque fois
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+STREAM_FORMATS = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+
+def stream_query(query, serialize, fmt: str = "json", chunk_size: int = 500) -> Response:
+    """
+    Répond avec tous les résultats de `query` sans les charger en mémoire : les lignes sont lues
+    par paquets de `chunk_size` (yield_per) et écrites au fur et à mesure, en tableau JSON ou en NDJSON.
+    `query` peut aussi être un itérable (générateur qui lit lui-même par paquets), seulement découpé
+    en paquets à l'écriture.
+    """
+    dumps = current_app.json.dumps
+    rows = query.yield_per(chunk_size) if hasattr(query, "yield_per") else query
+
+    def generate():
+        buffer = ["["] if fmt == "json" else []
+        separator = ""
+        for count, row in enumerate(rows, start=1):
+            if fmt == "json":
+                buffer.append(separator + dumps(serialize(row)))
+                separator = ","
+            else:
+                buffer.append(dumps(serialize(row)) + "\n")
+            if count % chunk_size == 0:
+                yield "".join(buffer)
+                buffer = []
+        if fmt == "json":
+            buffer.append("]")
+        yield "".join(buffer)
+
+    return Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[fmt])
+
+
+def parse_page_size(value, default: int, maximum: int) -> int:
+    """Borne la taille de page demandée entre 1 et maximum."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def parse_id_param(value, name: str) -> int | None:
+    """Paramètre d'URL contenant un id (entier positif) ; None s'il est absent, ValueError si invalide."""
+    if value is None or value == "":
+        return None
+    # isdigit() seul accepte aussi "²" ou "٣" : chiffres ASCII uniquement
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError(f"Le paramètre '{name}' doit être un entier positif")
+    return int(value)
+
+
 def login_required(view):
     @wraps(view)
     def wrapped_view(*args, **kwargs):
         if not hasattr(g, "user") or g.user is None:
             # Pour les routes API, on retourne une erreur JSON
             if request.is_json or request.path.startswith("/tasks/"):
-                return jsonify({"error": "Authentification requise", "message":"Vous devez être connecté pour faire cette action."}), 401
+                return jsonify({"error": "Authentification requise",
+                                "message": "Vous devez être connecté pour faire cette action."}), 401
             flash("Vous devez être connecté pour accéder à cette page.", "warning")
             return redirect(url_for("auth.login"))
         return view(*args, **kwargs)
@@ -39,9 +141,12 @@ def login_required(view):
 
 
 def admin_required(view):
+    from src.auth.user_cache import user_cache
+
     @wraps(view)
     def wrapped_view(*args, **kwargs):
-        if not hasattr(g, "user") or g.user is None or not g.user.is_admin_user():
+        # rôle relu en base : g.user vient du cache et peut dater de USER_CACHE_TTL secondes
+        if not hasattr(g, "user") or g.user is None or not user_cache.is_admin(g.user.id):
             flash("Accès réservé aux administrateurs.", "danger")
             return redirect(url_for("index"))
         return view(*args, **kwargs)
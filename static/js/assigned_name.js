@@ -1,23 +1,22 @@
-const name_btns = document.querySelectorAll('button.list');
+// Délégation : les noms des sous-tâches chargées plus tard sont aussi concernés
+document.addEventListener('click', (event) => {
+    const btn = event.target.closest('button.list');
+    if (!btn) return;
+    event.stopPropagation();
+    
+    const menu = btn.nextElementSibling;
+    const isOpen = !menu.classList.contains('collapsed'); // true = actuellement visible
 
-name_btns.forEach(btn => {
-    btn.addEventListener('click', (event) => {
-        event.stopPropagation();
-        
-        const menu = btn.nextElementSibling;
-        const isOpen = !menu.classList.contains('collapsed'); // true = actuellement visible
-
-        // Ferme tous
-        document.querySelectorAll('.names').forEach(m => {
-            m.classList.add('collapsed');
-        });
-
-        // Ouvre uniquement si c'était fermé
-        if (!isOpen) {
-            menu.classList.remove('collapsed');
-        }
+    // Ferme tous
+    document.querySelectorAll('.names').forEach(m => {
+        m.classList.add('collapsed');
     });
-});
+
+    // Ouvre uniquement si c'était fermé
+    if (!isOpen) {
+        menu.classList.remove('collapsed');
+    }
+}, true);
 
 document.addEventListener('click', () => {
     document.querySelectorAll('.names').forEach(m => m.classList.add('collapsed'));
@@ -1,151 +1,83 @@
-const calcProgress = (detailsElement) => {
-    // Cherche uniquement les <details> enfants DIRECTS
-    const directChildDetails = [...detailsElement.children].filter(el => 
-        el.tagName === 'DETAILS'
-    );
-
-    if (directChildDetails.length === 0) return 0;
-
-    let total = 0;
-
-    directChildDetails.forEach(child => {
-        const checkbox = child.querySelector(':scope > summary > input[type="checkbox"]');
-        const progressBar = child.querySelector(':scope > summary > .progressbar');
-
-        if (checkbox) {
-            // Tâche feuille → 100 si cochée, 0 sinon
-            total += checkbox.checked ? 100 : 0;
-        } else if (progressBar) {
-            // Tâche avec enfants → calcul récursif
-            total += calcProgress(child);
-        }
-    });
-
-    return Math.round(total / directChildDetails.length);
+// Avancement calculé par le serveur : la réponse du PATCH contient les ancêtres modifiés
+const setProgress = (progressBar, progress) => {
+    progressBar.setAttribute("aria-valuenow", progress);
+    progressBar.style.setProperty('--progress', progress + "%");
 }
 
-const updateAllParents = (checkboxElement) => {
-    // Remonte de details en details
-    let current = checkboxElement.closest('details')?.parentElement?.closest('details');
-
-    while (current) {
-        const progressBar = current.querySelector(':scope > summary > .progressbar');
-        if (progressBar) {
-            const progress = calcProgress(current);
-            const id = progressBar.getAttribute('id');
-
-            if(progress == 100 && localStorage.getItem(`progress-${id}`) <100){
-                fetch(`/tasks/${id}/status`,{
-                method: 'PATCH',
-                headers: {
-                    'Content-Type': 'application/json'},
-                body: JSON.stringify({status: true})
-                })
-                .catch((error) => {
-                    console.error("Erreur:", error);
-                })
-            }
-            if(progress < 100 && localStorage.getItem(`progress-${id}`) ==100){
-                fetch(`/tasks/${id}/status`,{
-                method: 'PATCH',
-                headers: {
-                    'Content-Type': 'application/json'},
-                body: JSON.stringify({status: false})
-                })
-                .catch((error) => {
-                    console.error("Erreur:", error);
-                })
-            }
-            progressBar.setAttribute("aria-valuenow", progress);
-            progressBar.style.setProperty('--progress', progress + "%");
-            localStorage.setItem(`progress-${id}`, progress);
-        }
-        current = current.parentElement?.closest('details');
-    }
+const updateAncestors = (ancestors) => {
+    (ancestors || []).forEach(ancestor => {
+        const progressBar = document.getElementById(ancestor.id);
+        if (!progressBar || !progressBar.classList.contains('progressbar')) return;
+        const progress = ancestor.subtasks_total
+            ? Math.round(ancestor.subtasks_done / ancestor.subtasks_total * 100)
+            : (ancestor.status ? 100 : 0);
+        setProgress(progressBar, progress);
+    });
 }
 
 
+//change le status des taches (délégation : les sous-tâches sont chargées à la demande)
 const upDateCheckboxes = () =>{
-    //change le status des taches
-    const inputElems = document.querySelectorAll('input[type="checkbox"]');
-    inputElems.forEach(checkboxe => {
-        checkboxe.addEventListener("click", async (e) => {
-            e.stopPropagation();
-
-            const taskId = checkboxe.dataset.taskId; 
-            
-            fetch(`/tasks/${taskId}/status`,{
-                method: 'PATCH',
-                headers: {
-                    'Content-Type': 'application/json'},
-                body: JSON.stringify({status:checkboxe.checked})
-            })
-            .then((response) => response.json())
-            .then((data) => {
-                if (data.success) {
-                    updateAllParents(checkboxe);
-                } else {
-                    checkboxe.checked = !checkboxe.checked;
-                }
-            })
-            .catch((error) => {
-                console.error("Erreur:", error);
+    document.addEventListener("click", (e) => {
+        const checkboxe = e.target.closest('input[type="checkbox"][data-task-id]');
+        if (!checkboxe) return;
+
+        const taskId = checkboxe.dataset.taskId; 
+        
+        fetch(`/tasks/${taskId}/status`,{
+            method: 'PATCH',
+            headers: {
+                'Content-Type': 'application/json'},
+            body: JSON.stringify({status:checkboxe.checked})
+        })
+        .then((response) => response.json())
+        .then((data) => {
+            if (data.success) {
+                updateAncestors(data.ancestors);
+            } else {
                 checkboxe.checked = !checkboxe.checked;
-            })
+            }
         })
-    });
+        .catch((error) => {
+            console.error("Erreur:", error);
+            checkboxe.checked = !checkboxe.checked;
+        })
+    }, true);
 }
 
 
 //garder les details ouvert
-const upDateDetails = ()=>{
-    document.querySelectorAll('details').forEach(details => {
-    const btn = details.querySelector('.add-task-btn');
-    if (!btn) return;
-    const id = btn.dataset.itemId;
-
-    // Restaure
-    if (localStorage.getItem(`details-${id}`) === 'true') {
-        details.open = true;
-    }
+const upDateDetails = (root = document)=>{
+    root.querySelectorAll('details[data-task-id]').forEach(details => {
+    const id = details.dataset.taskId;
 
     // Sauvegarde
     details.addEventListener('toggle', () => {
         localStorage.setItem(`details-${id}`, details.open);
         });
-    });
-}
 
-const updateProgress = () =>{
-    const progressbars = document.querySelectorAll(".progressbar")
-
-    progressbars.forEach(progressBar =>{
-        const taks_id= progressBar.getAttribute('id')
-
-        if(localStorage.getItem(`progress-${taks_id}`) !== null){
-            const progress = localStorage.getItem(`progress-${taks_id}`)
-            progressBar.setAttribute("aria-valuenow", progress)
-            progressBar.style.setProperty('--progress', progress + "%")
-        }
-    })
-    
+    // Restaure (l'ouverture charge les sous-tâches)
+    if (localStorage.getItem(`details-${id}`) === 'true') {
+        details.open = true;
+    }
+    });
 }
 
 //progressBar
-const enableProgressbar = () => {
-    const progressbars = document.querySelectorAll(".progressbar")
+const enableProgressbar = (root = document) => {
+    const progressbars = root.querySelectorAll(".progressbar")
     progressbars.forEach(bar =>{
         bar.setAttribute("role", "progressbar")
-        bar.setAttribute("aria-valuenow", 0)
+        bar.setAttribute("aria-valuenow", bar.dataset.progress || 0)
         bar.setAttribute("aria-live", "polite")
     })
 }
 
+document.addEventListener('subtasks:loaded', (event) => {
+    enableProgressbar(event.detail);
+    upDateDetails(event.detail);
+});
+
 upDateCheckboxes();
 upDateDetails();
 enableProgressbar();
-updateProgress();
-
-
-
-
@@ -11,6 +11,78 @@
 
     const joinedChannels = new Set()
 
+    // =============================================== HISTORIQUE =============================================
+
+    const loadedChannels = new Set()
+    const olderCursors   = {};   // { "channelId": id à passer en `before` pour la page précédente }
+
+    function renderMessage(display, msg) {
+        if (display.querySelector(`[data-message-id="${msg.id}"]`)) {
+            return null   // déjà affiché (reçu par Socket.IO pendant le chargement)
+        }
+        const user_id = Number(display.dataset.userId);
+
+        const p = document.createElement("p")
+        p.classList.add('conv_message')
+        p.dataset.messageId = msg.id
+        if (msg.author_id === user_id) {
+            p.classList.add('owned')
+            p.textContent = msg.content
+        } else {
+            const author = document.createElement("strong")
+            author.textContent = msg.author
+            p.append(author, ` : ${msg.content}`)
+        }
+        return p
+    }
+
+    // Charge la page la plus récente, ou la page précédant le curseur `before`
+    async function loadMessages(channelId, before = null) {
+        const display = document.getElementById(`message_display-${channelId}`)
+        if (!display) return
+
+        const params = new URLSearchParams()
+        if (before !== null) params.set("before", before)
+
+        try {
+            const res = await fetch(`/api/channel/${channelId}/messages?${params}`)
+            if (!res.ok) return
+            const data = await res.json()
+
+            const olderBtn = display.querySelector(".load-older")
+            const previousHeight = display.scrollHeight
+            const nodes = data.messages.map((msg) => renderMessage(display, msg)).filter(Boolean)
+            olderBtn.after(...nodes)
+
+            olderCursors[channelId] = data.next_cursor
+            olderBtn.classList.toggle("collapsed", data.next_cursor === null)
+
+            if (before === null) {
+                display.scrollTop = display.scrollHeight
+            } else {
+                // garder à l'écran le message qui était en haut avant l'ajout
+                display.scrollTop = display.scrollHeight - previousHeight
+            }
+        } catch (e) {
+            console.warn('Chargement des messages échoué :', e);
+        }
+    }
+
+    async function openDiscussion(channelId) {
+        if (loadedChannels.has(channelId)) return
+        loadedChannels.add(channelId)
+        await loadMessages(channelId)
+    }
+
+    document.querySelectorAll(".load-older").forEach((btn) => {
+        btn.addEventListener("click", () => {
+            const channelId = btn.closest(".message_display").id.replace("message_display-", "")
+            if (olderCursors[channelId]) {
+                loadMessages(channelId, olderCursors[channelId])
+            }
+        })
+    })
+
     // Ouvrir/fermer les discussions (doit fonctionner même sans Socket.IO)
     document.querySelectorAll(".btn-repondre").forEach((btn) => {
         btn.addEventListener("click", () => {
@@ -24,65 +96,49 @@
             panel.classList.toggle("collapsed")
 
             const isOpen = !panel.classList.contains("collapsed")
+            if (isOpen) {
+                openDiscussion(channelId)
+            }
             if (isOpen && socket && !joinedChannels.has(channelId)) {
                 socket.emit("join", { channel_id: Number(channelId) })
                 joinedChannels.add(channelId)
 
                 openTicketChat(ticketlId)
 
-                const messagerie = document.getElementById(`message_display-${channelId}`)
-                messagerie.scrollTop = messagerie.scrollHeight;
-
                 const input_message = panel.querySelector("form input")
-                input_message.focus()
+                if (input_message) input_message.focus()
             }
         })
     })
 
    // =============================================== UNREAD =============================================
 
-    const unreadCounts      = {};   // { "chanelId": count }
-    let   pollingInterval   = null;
+    const unreadCounts      = {};   // { "ticketId": count }
 
-    // ── Init ──────────────────────────────────────────────────
-    document.addEventListener('DOMContentLoaded', () => {
-        loadUnreadCounts();
-        startPolling();
-    });
-
-    // ── Polling toutes les 10 secondes ────────────────────────
-    function startPolling() {
-        pollingInterval = setInterval(async () => {
-            await loadUnreadCounts();
-        }, 10_000); // 10s — ajuste selon tes besoins
-    }
+    // ── Etat complet (envoyé par le serveur à chaque connexion Socket.IO) ──
+    function applyUnreadCounts(data) {
+        Object.entries(data).forEach(([ticketId, count]) => {
+            unreadCounts[ticketId] = count;
+            updateBadge(ticketId);
+        });
 
-    function stopPolling() {
-        clearInterval(pollingInterval);
+        // Remettre à 0 les tickets qui n'apparaissent plus dans l'état
+        Object.keys(unreadCounts).forEach(ticketId => {
+            if (!(ticketId in data)) {
+                unreadCounts[ticketId] = 0;
+                updateBadge(ticketId);
+            }
+        });
     }
 
-    // ── Fetch les compteurs depuis l'API ──────────────────────
+    // ── Sans Socket.IO : un seul chargement, pas de polling ──
     async function loadUnreadCounts() {
         try {
             const res  = await fetch('/api/messages/unread-counts');
             if (!res.ok) return;
-            const data = await res.json();  // {(channel_id, count)} { 12: 3, 7: 1 }
-
-            Object.entries(data).forEach(([ticketId, count]) => {
-                unreadCounts[ticketId] = count;
-                updateBadge(ticketId);
-            });
-
-            // Remettre à 0 les tickets qui n'apparaissent plus dans la réponse
-            Object.keys(unreadCounts).forEach(ticketId => {
-                if (!(ticketId in data)) {
-                    unreadCounts[ticketId] = 0;
-                    updateBadge(ticketId);
-                }
-            });
-
+            applyUnreadCounts(await res.json());  // { 12: 3, 7: 1 }
         } catch (e) {
-            console.warn('Polling non-lus échoué :', e);
+            console.warn('Chargement des non-lus échoué :', e);
         }
     }
 
@@ -112,8 +168,6 @@
             badge = document.createElement('span');
             badge.className = 'unread-badge';
             item.appendChild(badge);
-        } else{
-            alert("badge non reconue") //TODO remove debug
         }
 
         const count = unreadCounts[ticketId] || 0;
@@ -127,23 +181,34 @@
         }
     }
 
-    // ── Pause polling si onglet caché (économie réseau) ───────
-    document.addEventListener('visibilitychange', () => {
-        if (document.hidden) {
-            stopPolling();
-        } else {
-            loadUnreadCounts();  // refresh immédiat au retour
-            startPolling();
-        }
-    });
-
     // =================================================== SOCKETIO ===========================================
 
     if (!socket) {
         // Pas de transport temps réel disponible: on garde le comportement UI (toggle) uniquement.
+        loadUnreadCounts()
         return
     }
 
+    socket.on("unread_counts", applyUnreadCounts)
+
+    socket.on("unread_delta", ({ ticket_id, channel_id, author_id, delta }) => {
+        if (author_id === CURRENT_USER_ID) return;
+        const panel = document.querySelector(`#discussion-${channel_id}`)
+        if (panel && !panel.classList.contains("collapsed")) {
+            // discussion ouverte : le message est lu à l'arrivée
+            openTicketChat(ticket_id)
+            return
+        }
+        const key = String(ticket_id)
+        unreadCounts[key] = (unreadCounts[key] || 0) + delta;
+        updateBadge(key);
+    })
+
+    socket.on("unread_reset", ({ ticket_id }) => {
+        unreadCounts[String(ticket_id)] = 0;
+        updateBadge(String(ticket_id));
+    })
+
     //TODO implement typing...
 
     // Envoi d'un message (uniquement formulaires présents = utilisateurs connectés)
@@ -176,15 +241,10 @@
         if (!panel) {
             return
         }
-        const user_id = Number(panel.dataset.userId);
 
-        const p = document.createElement("p")
-        p.classList.add('conv_message')
-        if(msg.author_id === user_id){
-            p.classList.add('owned')
-            p.innerHTML = msg.content
-        } else {
-            p.innerHTML = `<strong>${msg.author}</strong> : ${msg.content}`
+        const p = renderMessage(panel, msg)
+        if (!p) {
+            return
         }
 
         const notice = panel.querySelector(".message.warning")
@@ -213,7 +273,8 @@
         // Restaure
         if (localStorage.getItem(`channel-${channelId}`) === 'true') {
             panel.classList.toggle("collapsed");
-            
+            openDiscussion(channelId)
+
             if (socket && !joinedChannels.has(channelId)) {
                 socket.emit("join", { channel_id: Number(channelId) })
                 joinedChannels.add(channelId)
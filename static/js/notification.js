@@ -98,10 +98,14 @@
         console.log("WebSocket connecté");
     });
 
-    // Écouter les nouvelles notifications
-    socket.on("new_notification", (notif) => {
-        showNotificationToast(notif.message, notif.type);
-        updateNotificationBadge();  // incrémenter le compteur dans le menu
+    // Notifications de l'utilisateur (une ou un lot, ex: changement de statut groupé) : un seul toast et un seul rafraîchissement
+    socket.on("new_notifications", (notifs) => {
+        if (!notifs || notifs.length === 0) return;
+        const message = notifs.length === 1
+            ? notifs[0].message
+            : `${notifs.length} nouvelles notifications`;
+        showNotificationToast(message, notifs[0].notification_type);
+        updateNotificationBadge();
 
         if (CURRENT_USER_ID){
             update_notif_display(CURRENT_USER_ID);
@@ -1,17 +1,20 @@
 const dialog_creation = document.getElementById('task-dialog');
 const dialog_update = document.getElementById('update-task-dialog')
-const optionBtns = document.querySelectorAll('.option-btn');
-const modifBtns = document.querySelectorAll('.modif-btn');
-const suprBtns= document.querySelectorAll('.suppr-btn')
-const assBtns = document.querySelectorAll('.assign-task-btn')
 let currentItemId = null;
 
+// Les sous-tâches arrivent après le chargement de la page (fragments de /tasks/<id>/children) :
+// les boutons sont gérés par délégation, en phase de capture car certains stoppent la propagation.
+const onClick = (selector, handler) => {
+    document.addEventListener('click', (event) => {
+        const btn = event.target.closest(selector);
+        if (btn) handler(btn, event);
+    }, true);
+}
+
 //MOdal de creation de tache
-document.querySelectorAll('.add-task-btn').forEach(btn => {
-    btn.addEventListener('click', () => {
-        currentItemId = btn.dataset.itemId;
-        dialog_creation.showModal();
-    });
+onClick('.add-task-btn', (btn) => {
+    currentItemId = btn.dataset.itemId;
+    dialog_creation.showModal();
 });
 
 document.getElementById('modal-cancel-btn').addEventListener('click', () => {
@@ -50,22 +53,20 @@ document.getElementById('notConnected').addEventListener('close', async (e) =>{
 })
 
 //bouton option
-optionBtns.forEach(btn => {
-    btn.addEventListener('click', (event) => {
-        event.stopPropagation(); // empêche la propagation au <summary>
+onClick('.option-btn', (btn, event) => {
+    event.stopPropagation(); // empêche la propagation au <summary>
 
-        const menu = btn.nextElementSibling; // le .menu-option juste après
+    const menu = btn.nextElementSibling; // le .menu-option juste après
 
-        // Ferme tous les autres menus
-        document.querySelectorAll('.menu-option').forEach(m => {
-            if (m !== menu){
-                m.classList.add('collapsed');
-            }
-            
-        });
-        // Toggle celui-ci
-        menu.classList.toggle('collapsed');
+    // Ferme tous les autres menus
+    document.querySelectorAll('.menu-option').forEach(m => {
+        if (m !== menu){
+            m.classList.add('collapsed');
+        }
+        
     });
+    // Toggle celui-ci
+    menu.classList.toggle('collapsed');
 });
 
 // Clic ailleurs = ferme tout
@@ -76,28 +77,26 @@ document.addEventListener('click', () => {
 //modal update de task 
 
 //pour modifier
-modifBtns.forEach((modif) =>{
-    modif.addEventListener('click', ()=> {
-        currentItemId= modif.dataset.itemId;
-        fetch(`/tasks/${currentItemId}/update`, {
-            method: 'GET',
-            headers: {
-                    'Content-Type': 'application/json'}
-        })
-        .then((response) => response.json())
-            .then((data) => {
-                if(data.success){
-                    const  titre = document.getElementById("update-title-input");
-                    titre.value = data.title;
-                    const content = document.getElementById("update-content-input");
-                    content.value = data.content;
-                    dialog_update.showModal()
-                }
-            })
-            .catch((error) => {
-                console.error("Erreur:", error);
-            })
+onClick('.modif-btn', (modif) => {
+    currentItemId= modif.dataset.itemId;
+    fetch(`/tasks/${currentItemId}/update`, {
+        method: 'GET',
+        headers: {
+                'Content-Type': 'application/json'}
     })
+    .then((response) => response.json())
+        .then((data) => {
+            if(data.success){
+                const  titre = document.getElementById("update-title-input");
+                titre.value = data.title;
+                const content = document.getElementById("update-content-input");
+                content.value = data.content;
+                dialog_update.showModal()
+            }
+        })
+        .catch((error) => {
+            console.error("Erreur:", error);
+        })
 })
 
 document.getElementById("update-cancel-btn").addEventListener('click', ()=>{
@@ -124,51 +123,73 @@ document.getElementById("modal-form_update").addEventListener('submit', (e) =>{
 })
 
 //pour supprimer
-suprBtns.forEach((supr) => {
-    supr.addEventListener('click', () => {
-        const currentItemId = supr.dataset.itemId;
+onClick('.suppr-btn', (supr) => {
+    const currentItemId = supr.dataset.itemId;
+    
+    fetch(`/tasks/${currentItemId}/delete`, {
+        method: 'DELETE',
+        headers: { 'Content-Type': 'application/json' }
+    })
+    .then(response => {
+        return response.json();
+    })
+    .then(data => {
         
-        fetch(`/tasks/${currentItemId}/delete`, {
-            method: 'DELETE',
-            headers: { 'Content-Type': 'application/json' }
-        })
-        .then(response => {
-            return response.json();
-        })
-        .then(data => {
-            
-            if (data.success) {
-                location.reload();
-            } else {
-                console.log('success = false');
-            }
-        })
-        .catch(error => {
-            console.error('Erreur catch:', error);
-        });
+        if (data.success) {
+            location.reload();
+        } else {
+            console.log('success = false');
+        }
+    })
+    .catch(error => {
+        console.error('Erreur catch:', error);
     });
 });
 
 //assign
-assBtns.forEach((ass)=> {
-    ass.addEventListener('click', ()=> {
-        const currentItemId = ass.dataset.itemId;
+onClick('.assign-task-btn', (ass) => {
+    const currentItemId = ass.dataset.itemId;
 
-        fetch(`/tasks/${currentItemId}/assign`,{
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' }
-        })
-        .then(response =>response.json())
-        .then(data =>{
-            if(data.success){
-                location.reload();
-            }
-        })
-        .catch(error => {
-            console.error('Erreur catch:', error);
-        });
+    fetch(`/tasks/${currentItemId}/assign`,{
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' }
+    })
+    .then(response =>response.json())
+    .then(data =>{
+        if(data.success){
+            location.reload();
+        }
+    })
+    .catch(error => {
+        console.error('Erreur catch:', error);
     });
 });
 
+//chargement des sous-tâches à la première ouverture d'une tâche
+const loadSubtasks = (details) => {
+    const container = details.querySelector(':scope > .subtasks');
+    if (!container || container.dataset.loaded) return;
+    container.dataset.loaded = "loading";
 
+    fetch(container.dataset.url)
+    .then(response => {
+        if (!response.ok) throw new Error(response.status);
+        return response.text();
+    })
+    .then(html => {
+        container.innerHTML = html;
+        container.dataset.loaded = "true";
+        document.dispatchEvent(new CustomEvent('subtasks:loaded', { detail: container }));
+    })
+    .catch(error => {
+        delete container.dataset.loaded;
+        console.error('Erreur catch:', error);
+    });
+}
 
+// "toggle" ne remonte pas : écouté en phase de capture
+document.addEventListener('toggle', (event) => {
+    if (event.target.matches('details') && event.target.open) {
+        loadSubtasks(event.target);
+    }
+}, true);
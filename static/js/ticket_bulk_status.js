@@ -0,0 +1,46 @@
+(() => {
+    const bar = document.getElementById('bulk-status');
+    if (!bar) return;
+
+    const countLabel = document.getElementById('bulk-count');
+    const statusSelect = document.getElementById('bulk-status-select');
+    const applyBtn = document.getElementById('bulk-status-apply');
+    const checkboxes = document.querySelectorAll('.bulk-select');
+
+    const selectedIds = () => [...checkboxes]
+        .filter((box) => box.checked)
+        .map((box) => Number(box.value));
+
+    // La barre n'apparaît que si au moins un ticket est coché
+    checkboxes.forEach((box) => {
+        box.addEventListener('change', () => {
+            const count = selectedIds().length;
+            countLabel.textContent = count;
+            bar.classList.toggle('collapsed', count === 0);
+        });
+    });
+
+    applyBtn.addEventListener('click', async () => {
+        const ticketIds = selectedIds();
+        if (ticketIds.length === 0) return;
+
+        applyBtn.disabled = true;
+        try {
+            const res = await fetch('/ticket/bulk_update_status', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ ticket_ids: ticketIds, status: statusSelect.value }),
+            });
+            const data = await res.json();
+            if (data.success) {
+                location.reload();
+            } else {
+                console.warn(data.error);
+            }
+        } catch (error) {
+            console.error('Erreur:', error);
+        } finally {
+            applyBtn.disabled = false;
+        }
+    });
+})();
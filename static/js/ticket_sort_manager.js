@@ -39,6 +39,15 @@
         debounceTimer = window.setTimeout(submitFilters, 750);
     };
 
+    // Une recherche par mot clé est classée par pertinence, sauf si l'utilisateur a choisi un autre tri
+    if (searchInput && sortSelect) {
+        searchInput.addEventListener('input', () => {
+            if (searchInput.value.trim() && sortSelect.value === 'recent') {
+                sortSelect.value = 'pertinence';
+            }
+        });
+    }
+
     [statusSelect, sortSelect, categorieSelect].forEach((element) => {
         if (!element) return;
         element.addEventListener('change', submitFilters);
@@ -0,0 +1,63 @@
+"""Fixtures partagées : application sur une base SQLite temporaire."""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+# Le moteur est créé par db.init_app à l'import de l'application :
+# la base de test doit donc être choisie avant cet import.
+_, _DB_PATH = tempfile.mkstemp(suffix=".db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+# Émissions Socket.IO par la file partagée, comme en multi-workers, avec le courtier en mémoire
+os.environ["SOCKETIO_MESSAGE_QUEUE"] = "local://"
+
+from app import app as flask_app  # noqa: E402
+from src.auth.user_cache import user_cache  # noqa: E402
+from src.models.database import db  # noqa: E402
+from src.models.migrations import upgrade  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config.update(TESTING=True, SECRET_KEY="test")
+    with flask_app.app_context():
+        db.engine.echo = False
+        db.drop_all()
+        db.create_all()
+        upgrade()
+        user_cache.clear()  # les ids repartent de 1 à chaque test
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def api_client(app):
+    with app.test_client() as test_client:
+        yield test_client
+
+
+def login_as(test_client, user) -> None:
+    """Ouvre une session pour `user` sans passer par le formulaire de connexion."""
+    with test_client.session_transaction() as sess:
+        sess["user_id"] = user.id
+        sess["role"] = user.role
+        sess["username"] = user.username
+
+
+@contextmanager
+def count_queries():
+    """Compte les requêtes SQL émises dans le bloc : `with count_queries() as queries: ...`."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
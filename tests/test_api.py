@@ -0,0 +1,129 @@
+from src.models import Notification, Task, Ticket, User
+from tests.conftest import login_as
+
+
+def test_tickets_conditional_get(api_client, app):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    ticket = Ticket.create(title="A", content="B", author_id=alice.id)
+
+    first = api_client.get("/api/tickets")
+    assert first.status_code == 200
+    assert first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+
+    again = api_client.get("/api/tickets", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.data == b""
+
+    # If-Modified-Since seul ne suffit pas : une suppression ne change pas la date (voir plus bas)
+    since = api_client.get("/api/tickets", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert since.status_code == 200
+
+    ticket.update(status="resolu")
+    changed = api_client.get("/api/tickets", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.json["tickets"][0]["status"] == "resolu"
+
+    # l'ETag dépend aussi des paramètres de la requête
+    other = api_client.get("/api/tickets?status=resolu", headers={"If-None-Match": changed.headers["ETag"]})
+    assert other.status_code == 200
+
+
+def test_conditional_get_sees_the_deletion_of_an_older_ticket(api_client, app):
+    from src.models.database import db
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    older = Ticket.create(title="A", content="B", author_id=alice.id)
+    Ticket.create(title="C", content="D", author_id=alice.id)
+
+    first = api_client.get("/api/tickets")
+    db.session.delete(older)
+    db.session.commit()
+
+    headers = {"If-None-Match": first.headers["ETag"], "If-Modified-Since": first.headers["Last-Modified"]}
+    changed = api_client.get("/api/tickets", headers=headers)
+    assert changed.status_code == 200
+    assert [t["title"] for t in changed.json["tickets"]] == ["C"]
+    since_only = {"If-Modified-Since": first.headers["Last-Modified"]}
+    assert api_client.get("/api/tickets", headers=since_only).status_code == 200
+
+
+def test_tasks_conditional_get_sees_status_changes(api_client, app):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    task = Task.create_Task(title="Semaine 1", content="", user_id=alice.id)
+
+    etag = api_client.get("/api/tasks").headers["ETag"]
+    assert api_client.get("/api/tasks", headers={"If-None-Match": etag}).status_code == 304
+
+    task.update_status(True)
+    assert api_client.get("/api/tasks", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_notification_unread_count_conditional_get(api_client, app):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    login_as(api_client, alice)
+
+    first = api_client.get("/api/notification/unread-counts")
+    assert first.json == {"count": 0}
+    etag = first.headers["ETag"]
+    url = "/api/notification/unread-counts"
+    assert api_client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    Notification.create(user_id=alice.id, message="Ticket résolu", type="statut")
+    changed = api_client.get("/api/notification/unread-counts", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json == {"count": 1}
+
+    etag = changed.headers["ETag"]
+    Notification.marke_all_read(alice.id)
+    assert api_client.get(url, headers={"If-None-Match": etag}).json == {"count": 0}
+
+
+def test_tasks_tree_is_serialized_in_one_query_with_depth_and_root(api_client, app):
+    from tests.conftest import count_queries
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    week = Task.create_Task(title="Semaine 1", content="", user_id=alice.id)
+    parent = week
+    for level in range(50):
+        parent = Task.create_Task(title=f"Niveau {level}", content="", user_id=alice.id, parent_id=parent.id)
+
+    with count_queries() as queries:
+        tree = api_client.get("/api/tasks").json
+    assert len([q for q in queries if 'FROM "Task"' in q]) == 2  # version (ETag) + arbre
+
+    node, levels = tree[0], 0
+    while node["subtasks"]:
+        node, levels = node["subtasks"][0], levels + 1
+    assert levels == 50
+    assert node["parent_title"] == "Niveau 48"
+
+    shallow = api_client.get("/api/tasks", query_string={"depth": 1}).json
+    assert shallow[0]["subtasks"][0]["subtasks"] == []
+    assert shallow[0]["subtasks"][0]["subtasks_total"] == 1
+
+    sub = api_client.get("/api/tasks", query_string={"root_id": parent.parent_id, "depth": 0}).json
+    assert [(t["id"], t["parent_title"]) for t in sub] == [(parent.parent_id, "Niveau 47")]
+    assert api_client.get("/api/tasks", query_string={"root_id": 999999}).status_code == 404
+
+
+def test_tasks_stream_matches_the_tree_root_by_root(api_client, app, monkeypatch):
+    import json
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    weeks = [Task.create_Task(title=f"Semaine {w}", content="", user_id=alice.id) for w in range(3)]
+    for week in weeks:
+        for d in range(2):
+            day = Task.create_Task(title=f"Jour {d}", content="", user_id=alice.id, parent_id=week.id)
+            Task.create_Task(title="Tâche", content="", user_id=alice.id, parent_id=day.id)
+    monkeypatch.setitem(app.config, "STREAM_CHUNK_SIZE", 2)
+
+    for params in ({}, {"depth": 1}, {"root_id": weeks[1].id}, {"root_id": weeks[1].id + 1, "depth": 0}):
+        expected = api_client.get("/api/tasks", query_string=params).json
+        streamed = api_client.get("/api/tasks", query_string={**params, "stream": "json"})
+        assert streamed.is_streamed
+        assert json.loads(streamed.data) == expected
+        lines = api_client.get("/api/tasks", query_string={**params, "stream": "ndjson"}).data.splitlines()
+        assert [json.loads(line) for line in lines] == expected
+
+    assert api_client.get("/api/tasks", query_string={"root_id": 999999, "stream": "json"}).status_code == 404
@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.models import Notification, Ticket, User
+
+NOW = datetime(2030, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def scheduler(app, monkeypatch):
+    from src import service
+    from src.ticket.deadlines import deadline_scheduler
+
+    monkeypatch.setattr(service.socketio, "emit", lambda *args, **kwargs: None)
+    deadline_scheduler.heap, deadline_scheduler.deadlines, deadline_scheduler.loaded_until = [], {}, None
+    yield deadline_scheduler
+    deadline_scheduler.heap, deadline_scheduler.deadlines, deadline_scheduler.loaded_until = [], {}, None
+
+
+def test_scheduler_loads_window_and_fires_each_lead_time_once(app, scheduler):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    soon = Ticket.create(title="Bientôt", content="x", author_id=alice.id, deadline=NOW + timedelta(hours=2))
+    Ticket.create(title="Loin", content="x", author_id=alice.id, deadline=NOW + timedelta(days=30))
+    Ticket.create(title="Fini", content="x", author_id=alice.id, deadline=NOW + timedelta(hours=2),
+                  status="resolu")
+
+    scheduler.load_window(NOW)
+    assert {entry[1] for entry in scheduler.heap} == {soon.id}
+
+    # la notification « 1 jour avant » est déjà hors délai de grâce, « 1 h avant » tombe à NOW + 1 h
+    assert scheduler.run_due(NOW) == 0
+    assert scheduler.run_due(NOW + timedelta(hours=1)) == 1
+    assert scheduler.run_due(NOW + timedelta(hours=2)) == 1
+    assert scheduler.run_due(NOW + timedelta(hours=3)) == 0
+
+    messages = [n.message for n in Notification.query.filter_by(type="deadline", user_id=alice.id)]
+    assert messages == ["Le ticket « Bientôt » arrive à échéance dans 1 h",
+                        "L'échéance du ticket « Bientôt » est atteinte"]
+
+
+def test_scheduler_follows_deadline_changes_without_reloading(app, scheduler):
+    from tests.conftest import count_queries
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    ticket = Ticket.create(title="Mobile", content="x", author_id=alice.id, deadline=NOW + timedelta(days=10))
+    scheduler.load_window(NOW)
+    assert scheduler.heap == []
+
+    # l'échéance rapprochée est ajoutée au tas par l'événement de mise à jour, sans relire la table
+    with count_queries() as queries:
+        ticket.update(deadline=NOW + timedelta(hours=3))
+    assert not any("WHERE \"Ticket\".deadline >=" in q for q in queries)
+    assert {entry[0] for entry in scheduler.heap} >= {NOW + timedelta(hours=2), NOW + timedelta(hours=3)}
+
+    # puis repoussée : les entrées déjà dans le tas sont périmées et ignorées
+    ticket.update(deadline=NOW + timedelta(hours=5))
+    ticket.update(status="resolu")
+    assert scheduler.run_due(NOW + timedelta(hours=6)) == 0
+    assert Notification.query.filter_by(type="deadline").count() == 0
+
+
+def test_scheduler_loop_survives_database_errors(app, scheduler, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    from src.ticket import deadlines
+
+    class Stop(Exception):
+        pass
+
+    calls, sleeps = [], []
+
+    def flaky_tick(now):
+        calls.append(now)
+        if len(calls) < 3:
+            raise OperationalError("SELECT 1", {}, Exception("base indisponible"))
+        scheduler.loaded_until = now + timedelta(hours=1)
+        return 0
+
+    class Wakeup:
+        def clear(self):
+            pass
+
+        def wait(self, timeout):
+            raise Stop  # première attente normale : la boucle a repris
+
+    # sur la classe : un attribut d'instance survivrait au test (méthode liée restaurée sur l'instance)
+    monkeypatch.setattr(type(scheduler), "tick", lambda self, now: flaky_tick(now))
+    monkeypatch.setattr(scheduler, "_wakeup", Wakeup())
+    monkeypatch.setattr(deadlines.socketio, "sleep", sleeps.append)
+    with pytest.raises(Stop):
+        scheduler._run()
+    assert len(calls) == 3
+    assert sleeps == [deadlines.RETRY_DELAY, deadlines.RETRY_DELAY * 2]
+
+
+def test_failed_notification_is_put_back_in_the_heap(app, scheduler, monkeypatch):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    Ticket.create(title="Bientôt", content="x", author_id=alice.id, deadline=NOW + timedelta(minutes=30))
+    scheduler.load_window(NOW)
+    pending = len(scheduler.heap)
+
+    def broken(self, *args):
+        raise RuntimeError("envoi impossible")
+
+    monkeypatch.setattr(type(scheduler), "_notify", broken)
+    with pytest.raises(RuntimeError):
+        scheduler.run_due(NOW + timedelta(minutes=30))
+    assert len(scheduler.heap) == pending
+
+
+def test_only_the_lease_holder_sends_notifications(app, scheduler):
+    import copy
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    later = NOW + scheduler.refresh * 3
+    # la notification « 1 h avant » tombe juste à l'expiration du bail du premier worker
+    Ticket.create(title="Bientôt", content="x", author_id=alice.id, deadline=later + timedelta(hours=1))
+    other = copy.copy(scheduler)  # second worker, même configuration (sans réenregistrer les événements)
+    scheduler.holder, other.holder = "worker-1", "worker-2"
+
+    scheduler.tick(NOW)
+    other.tick(NOW)
+    assert scheduler.heap and not other.heap
+
+    # le premier worker disparaît : le second prend le relais à l'expiration du bail
+    assert other.tick(later) == 1
+    assert scheduler.tick(later) == 0 and not scheduler.heap
+    assert Notification.query.filter_by(type="deadline").count() == 1
+
+
+def test_deadline_notification_is_unique_even_when_the_check_races(app, scheduler, monkeypatch):
+    from src.ticket import deadlines
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    ticket = Ticket.create(title="Bientôt", content="x", author_id=alice.id, deadline=NOW)
+    deadline = deadlines.to_utc_aware(Ticket.find_by_id(ticket.id).deadline)
+    assert scheduler._notify(ticket.id, 0, deadline) == 1
+
+    class NothingYet:
+        query = Notification.query.filter(False)
+
+    # les deux processus ont passé la vérification avant que l'un des deux n'écrive
+    monkeypatch.setattr(deadlines, "Notification", NothingYet)
+    assert scheduler._notify(ticket.id, 0, deadline) == 0
+    assert Notification.query.filter_by(type="deadline").count() == 1
+
+    # l'unicité ne concerne que les échéances
+    for _ in range(2):
+        Notification.create(user_id=alice.id, message="Le ticket est resolu", type="statut",
+                            ticket_id=ticket.id)
+    assert Notification.query.filter_by(type="statut").count() == 2
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from datafixtures import importer
+from src.models import Task, Ticket, User
+from src.models.database import db
+from src.models.task import TaskClosure
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # des éléments coupés par la fin du tampon à chaque lecture
+    monkeypatch.setattr(importer, "CHUNK_SIZE", 7)
+
+
+def test_iter_records_streams_json_arrays_and_ndjson(tmp_path, small_chunks):
+    records = [{"id": i, "title": f"t{i}", "n": 12345 * i, "nested": {"a": [1, 2]}} for i in range(20)]
+    array = tmp_path / "data.json"
+    array.write_text(json.dumps(records, indent=2), encoding="utf-8")
+    ndjson = tmp_path / "data.ndjson"
+    ndjson.write_text("\n".join(json.dumps(r) for r in records) + "\n\n", encoding="utf-8")
+
+    assert list(importer.iter_records(str(array))) == records
+    assert list(importer.iter_records(str(ndjson))) == records
+
+    array.write_text('[{"id": 1}, {"id": 2}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(importer.iter_records(str(array)))
+
+
+def test_import_file_batches_skips_existing_rows_and_rebuilds_indexes(app, tmp_path, small_chunks):
+    users = tmp_path / "users.ndjson"
+    users.write_text("\n".join(json.dumps({"id": i, "username": f"u{i}", "email": f"u{i}@example.com",
+                                           "password": "secret"}) for i in (1, 2)), encoding="utf-8")
+    assert importer.import_file("users", str(users))["inserted"] == 2
+    assert User.find_by_username("u2").check_password("secret")
+
+    stats = importer.import_file("tasks", "datafixtures/JSON/task.JSON", batch_size=4)
+    total = Task.query.count()
+    assert stats["inserted"] == total > 4
+    week = Task.query.filter_by(parent_id=None).order_by(Task.id).first()
+    assert week.subtasks_total == len(Task.find_descendants(week.id, max_depth=1)) > 0
+    assert TaskClosure.query.filter(TaskClosure.depth == 0).count() == total
+
+    tickets = tmp_path / "tickets.json"
+    tickets.write_text(json.dumps([
+        {"id": "1", "title": "Imprimante en panne", "content": "bourrage", "status": "en_attente",
+         "deadline": "2026-02-10 23:59:59.999999", "created_at": "2026-02-17 07:44:39", "author_id": 1},
+        {"id": "2", "title": "Accès git", "content": "NULL", "created_at": None, "author_id": 2},
+        {"id": "2", "title": "doublon dans le fichier", "content": "", "author_id": 2},
+    ]), encoding="utf-8")
+    assert importer.import_file("tickets", str(tickets)) | {"seconds": 0, "rows_per_second": 0} == {
+        "inserted": 2, "skipped": 1, "seconds": 0, "rows_per_second": 0}
+    assert [t.id for t in Ticket.search(q="imprimante")] == [1]
+    assert db.session.get(Ticket, 2).content == ""  # "NULL" est un marqueur de valeur absente
+
+    # relancer l'import n'ajoute rien et ne modifie pas les lignes existantes
+    assert importer.import_file("tasks", "datafixtures/JSON/task.JSON")["inserted"] == 0
+    assert importer.import_file("tickets", str(tickets))["skipped"] == 3
+    assert Task.query.count() == total and Ticket.query.count() == 2
+    assert db.session.get(Ticket, 2).title == "Accès git"
@@ -0,0 +1,109 @@
+import pytest
+
+from src.models import Channel, Message, User
+
+
+@pytest.fixture
+def channel(app):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    channel = Channel.create(name="Discussion ticket #1")
+    for i in range(7):
+        Message.create(content=f"message {i}", author_id=alice.id, channel_id=channel.id)
+    return channel
+
+
+def test_channel_messages_returns_latest_page_then_older_pages(api_client, channel):
+    response = api_client.get(f"/api/channel/{channel.id}/messages", query_string={"limit": 3})
+    assert response.status_code == 200
+    assert [m["content"] for m in response.json["messages"]] == ["message 4", "message 5", "message 6"]
+    assert response.json["messages"][0]["author"] == "alice"
+
+    before = response.json["next_cursor"]
+    response = api_client.get(f"/api/channel/{channel.id}/messages",
+                              query_string={"limit": 3, "before": before})
+    assert [m["content"] for m in response.json["messages"]] == ["message 1", "message 2", "message 3"]
+
+    before = response.json["next_cursor"]
+    response = api_client.get(f"/api/channel/{channel.id}/messages",
+                              query_string={"limit": 3, "before": before})
+    assert [m["content"] for m in response.json["messages"]] == ["message 0"]
+    assert response.json["next_cursor"] is None
+
+
+def test_manage_ticket_does_not_render_discussions(api_client, channel):
+    from src.models import Ticket
+
+    Ticket.create(title="T", content="C", author_id=1, channel_id=channel.id)
+    response = api_client.get("/ticket/")
+    assert b"message 6" not in response.data
+    assert f'id="message_display-{channel.id}"'.encode() in response.data
+
+
+def test_channel_messages_since_pages_forward_and_rejects_bad_ids(api_client, channel):
+    url = f"/api/channel/{channel.id}/messages"
+    first_id = Message.find_since(channel.id)[0].id
+
+    response = api_client.get(url, query_string={"since": first_id, "limit": 4})
+    assert [m["content"] for m in response.json["messages"]] == [f"message {i}" for i in range(1, 5)]
+    response = api_client.get(url, query_string={"since": response.json["next_since"], "limit": 4})
+    assert [m["content"] for m in response.json["messages"]] == ["message 5", "message 6"]
+    assert response.json["next_since"] is None
+
+    invalid = ({"since": "abc"}, {"before": "-1"}, {"since": "1 OR 1=1"}, {"since": "²"}, {"before": "٣"})
+    for params in invalid:
+        response = api_client.get(url, query_string=params)
+        assert response.status_code == 400
+        assert response.json["error"] == f"Le paramètre '{next(iter(params))}' doit être un entier positif"
+
+
+def test_read_watermark_counts_only_newer_messages_from_others(app, channel):
+    from src.models.message import ChannelReadState
+
+    bob = User.create_user("bob", "bob@example.com", "secret")
+    assert dict(Message.get_unread_counts_by_channel(bob.id)) == {channel.id: 7}
+
+    assert Message.mark_channel_as_read(channel.id, bob.id) == 7
+    assert Message.get_unread_counts_by_channel(bob.id) == []
+    assert Message.mark_channel_as_read(channel.id, bob.id) == 0
+
+    Message.create(content="réponse de bob", author_id=bob.id, channel_id=channel.id)
+    latest = Message.create(content="nouveau", author_id=channel.messages[0].author_id, channel_id=channel.id)
+    assert dict(Message.get_unread_counts_by_channel(bob.id)) == {channel.id: 1}
+
+    # le marqueur ne recule jamais
+    ChannelReadState.mark_read(bob.id, channel.id, 1)
+    assert Message.mark_channel_as_read(channel.id, bob.id) == 1
+    assert ChannelReadState.last_read(bob.id, channel.id) == latest.id
+    assert ChannelReadState.query.count() == 1
+
+
+def test_unread_counts_by_ticket_in_one_query(api_client, channel):
+    from tests.conftest import count_queries, login_as
+    from src.models import Ticket
+
+    alice = User.query.filter_by(username="alice").one()
+    bob = User.create_user("bob", "bob@example.com", "secret")
+    first = Ticket.create(title="Premier", content="contenu", author_id=alice.id)
+    first.update(channel_id=channel.id)
+    other = Channel.create(name="Discussion ticket #2")
+    second = Ticket.create(title="Second", content="contenu", author_id=bob.id)
+    second.update(channel_id=other.id)
+    Message.create(content="lu par bob", author_id=alice.id, channel_id=other.id)
+    Message.mark_channel_as_read(other.id, bob.id)
+    Message.create(content="nouveau", author_id=alice.id, channel_id=other.id)
+    Message.create(content="de bob", author_id=bob.id, channel_id=other.id)
+    # channel sans ticket : non compté
+    orphan = Channel.create(name="Orpheline")
+    Message.create(content="hors ticket", author_id=alice.id, channel_id=orphan.id)
+
+    bob_id = bob.id
+    with count_queries() as queries:
+        counts = Message.get_unread_counts_by_ticket(bob_id)
+    assert len(queries) == 1
+    assert counts == {first.id: 7, second.id: 1}
+
+    login_as(api_client, bob)
+    response = api_client.get("/api/messages/unread-counts")
+    assert response.status_code == 200
+    assert response.json == {str(first.id): 7, str(second.id): 1}
+    assert Ticket.find_by_channel_id(other.id).id == second.id
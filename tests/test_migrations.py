@@ -0,0 +1,76 @@
+from sqlalchemy import inspect, text
+
+from src.models.database import db
+from src.models.migrations import MIGRATIONS, schema_version, upgrade
+
+
+def index_names(table_name):
+    return {index["name"] for index in inspect(db.engine).get_indexes(table_name)}
+
+
+def test_fresh_database_is_at_latest_version(app):
+    assert upgrade() == []
+    versions = db.session.execute(db.select(schema_version.c.version)).scalars().all()
+    assert versions == [version for version, _, _ in MIGRATIONS]
+
+
+def test_upgrade_adds_missing_indexes_to_existing_database(app):
+    # Base créée avant l'ajout des index : ni index ni historique de migration
+    db.session.execute(text("DROP INDEX ix_ticket_status_created"))
+    db.session.execute(text("DROP INDEX ix_message_channel_id"))
+    db.session.execute(schema_version.delete())
+    db.session.commit()
+    assert "ix_ticket_status_created" not in index_names("Ticket")
+
+    applied = upgrade()
+
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    assert "ix_ticket_status_created" in index_names("Ticket")
+    assert "ix_message_channel_id" in index_names("Message")
+    assert upgrade() == []
+
+
+def test_read_receipts_become_channel_watermarks(app):
+    from src.models import Channel, Message, User
+    from src.models.message import ChannelReadState
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    bob = User.create_user("bob", "bob@example.com", "secret")
+    channel = Channel.create(name="Discussion")
+    messages = [Message.create(content=f"m{i}", author_id=alice.id, channel_id=channel.id) for i in range(4)]
+
+    # base antérieure : un accusé de lecture par message
+    db.session.execute(text(
+        "CREATE TABLE message_read_status "
+        "(id INTEGER PRIMARY KEY, message_id INTEGER, user_id INTEGER, read_at DATETIME)"
+    ))
+    for message in messages[:3]:
+        db.session.execute(text("INSERT INTO message_read_status (message_id, user_id) VALUES (:m, :u)"),
+                           {"m": message.id, "u": bob.id})
+    db.session.execute(schema_version.delete().where(schema_version.c.version == 8))
+    db.session.commit()
+
+    assert upgrade() == [8]
+    assert not inspect(db.engine).has_table("message_read_status")
+    assert ChannelReadState.last_read(bob.id, channel.id) == messages[2].id
+    assert dict(Message.get_unread_counts_by_channel(bob.id)) == {channel.id: 1}
+
+
+def test_upgraded_database_has_the_same_indexes_as_a_fresh_one(app):
+    def index_names():
+        inspector = inspect(db.engine)
+        return {(table, index["name"]) for table in inspector.get_table_names()
+                for index in inspector.get_indexes(table)}
+
+    fresh = index_names()
+
+    # base restée en version 1, avec la table des accusés de lecture d'origine
+    db.session.execute(text(
+        "CREATE TABLE message_read_status "
+        "(id INTEGER PRIMARY KEY, message_id INTEGER, user_id INTEGER, read_at DATETIME)"
+    ))
+    db.session.execute(schema_version.delete().where(schema_version.c.version >= 2))
+    db.session.commit()
+
+    assert upgrade() == [version for version, _, _ in MIGRATIONS if version >= 2]
+    assert index_names() == fresh
@@ -0,0 +1,153 @@
+import pytest
+
+from src.models import Task, User
+
+
+def build_tree(author, assignee, weeks, depth=3, width=2):
+    """Crée `weeks` semaines, chacune avec un arbre de sous-tâches de profondeur `depth`."""
+    for w in range(weeks):
+        level = [Task.create_Task(title=f"Semaine {w}", content="", user_id=author.id)]
+        for d in range(depth):
+            level = [
+                Task.create_Task(title=f"T{w}.{d}.{i}", content="", user_id=author.id, parent_id=parent.id,
+                                 assigned_id=assignee.id if d == depth - 1 else None)
+                for parent in level for i in range(width)
+            ]
+
+
+def test_planning_page_query_count_does_not_grow_with_tree(app, api_client):
+    from tests.conftest import count_queries
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    bob = User.create_user("bob", "bob@example.com", "secret")
+
+    build_tree(alice, bob, weeks=1)
+    with count_queries() as few:
+        response = api_client.get("/tasks/")
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    # seules les semaines sont rendues, avec l'assigné de leurs feuilles
+    assert page.count("<details") == 1
+    assert page.count('<p class="assigned">bob</p>') == 1
+
+    build_tree(alice, bob, weeks=4, depth=5)
+    with count_queries() as many:
+        assert api_client.get("/tasks/").status_code == 200
+
+    assert len(many) == len(few)
+
+
+def test_children_endpoint_returns_one_level_with_counters(app, api_client):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    bob = User.create_user("bob", "bob@example.com", "secret")
+    build_tree(alice, bob, weeks=1, depth=2)
+    week = Task.query.filter_by(parent_id=None).one()
+    day = Task.find_descendants(week.id, max_depth=1)[0]
+    leaf = Task.find_descendants(day.id, max_depth=1)[0]
+    leaf.update_status(True)
+
+    fragment = api_client.get(f"/tasks/{week.id}/children").get_data(as_text=True)
+    assert fragment.count("<details") == 2
+    assert 'class="task1"' in fragment
+    assert f'data-url="/tasks/{day.id}/children"' in fragment
+
+    children = api_client.get(f"/tasks/{day.id}/children", query_string={"format": "json"}).json
+    assert [(c["title"], c["status"], c["assigned_names"]) for c in children] == [
+        ("T0.1.0", True, "bob"), ("T0.1.1", False, "bob")]
+    assert api_client.get(f"/tasks/{week.id}/children?format=json").json[0]["completion_rate"] == 50.0
+    assert api_client.get("/tasks/999999/children").status_code == 404
+
+
+def test_task_progress_counters_propagate_up_the_ancestors(app, api_client):
+    from src.models.database import db
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    week = Task.create_Task(title="Semaine", content="", user_id=alice.id)
+    day = Task.create_Task(title="Jour", content="", user_id=alice.id, parent_id=week.id)
+    a = Task.create_Task(title="A", content="", user_id=alice.id, parent_id=day.id)
+    b = Task.create_Task(title="B", content="", user_id=alice.id, parent_id=day.id)
+    assert (day.subtasks_done, day.subtasks_total) == (0, 2)
+
+    api_client.patch(f"/tasks/{a.id}/status", json={"status": True})
+    response = api_client.patch(f"/tasks/{b.id}/status", json={"status": True})
+    # le dernier enfant terminé termine le jour, qui termine la semaine
+    assert [(t["id"], t["status"]) for t in response.json["ancestors"]] == [(day.id, True), (week.id, True)]
+    db.session.expire_all()
+    assert day.status and week.status
+    assert week.completion_count == (1, 1)
+
+    # une nouvelle sous-tâche rouvre toute la branche
+    c = Task.create_Task(title="C", content="", user_id=alice.id, parent_id=day.id)
+    db.session.expire_all()
+    assert (day.status, day.completion_count, week.status) == (False, (2, 3), False)
+
+    c.delete_Task()
+    db.session.expire_all()
+    assert (day.status, week.status, day.completion_rate) == (True, True, 100.0)
+
+    # la reconstruction retrouve les mêmes compteurs
+    db.session.execute(db.update(Task).values(subtasks_done=0, subtasks_total=0))
+    Task.rebuild_progress()
+    db.session.commit()
+    assert [(t.subtasks_done, t.subtasks_total) for t in (week, day, a)] == [(1, 1), (2, 2), (0, 0)]
+
+
+def test_closure_table_answers_subtree_questions_and_follows_moves(app):
+    from src.models.database import db
+    from src.models.task import TaskClosure
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    week1 = Task.create_Task(title="Semaine 1", content="", user_id=alice.id)
+    week2 = Task.create_Task(title="Semaine 2", content="", user_id=alice.id)
+    day = Task.create_Task(title="Lundi", content="", user_id=alice.id, parent_id=week1.id)
+    task = Task.create_Task(title="Tâche", content="", user_id=alice.id, parent_id=day.id)
+    task.update_status(True)
+
+    assert [t.id for t in Task.find_descendants(week1.id)] == [day.id, task.id]
+    assert [t.id for t in Task.find_ancestors(task.id)] == [day.id, week1.id]
+    assert Task.is_descendant_of(task.id, week1.id)
+
+    # re-parentage du jour entier : fermeture et avancement suivent
+    day.update(parent_id=week2.id)
+    assert Task.is_descendant_of(task.id, week2.id) and not Task.is_descendant_of(task.id, week1.id)
+    db.session.expire_all()
+    assert (week1.subtasks_total, week2.subtasks_done, week2.subtasks_total) == (0, 1, 1)
+
+    with pytest.raises(ValueError):
+        week2.update(parent_id=task.id)
+
+    task.delete_Task()
+    assert Task.find_descendants(week2.id) == [day]
+
+    closure = db.session.query(TaskClosure.ancestor_id, TaskClosure.descendant_id, TaskClosure.depth)
+    expected = set(closure)
+    Task.rebuild_closure()
+    assert set(closure) == expected
+
+
+def test_deleting_a_middle_task_detaches_its_subtree_from_the_ancestors(app):
+    from src.models.database import db
+    from src.models.task import TaskClosure
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    week = Task.create_Task(title="Semaine", content="", user_id=alice.id)
+    monday = Task.create_Task(title="Lundi", content="", user_id=alice.id, parent_id=week.id)
+    task = Task.create_Task(title="Tâche", content="", user_id=alice.id, parent_id=monday.id)
+    sub = Task.create_Task(title="Sous-tâche", content="", user_id=alice.id, parent_id=task.id)
+    tuesday = Task.create_Task(title="Mardi", content="", user_id=alice.id, parent_id=week.id)
+    tuesday.update_status(True)
+
+    monday.delete_Task()
+    db.session.expire_all()
+
+    # la sous-tâche devient une racine avec son propre sous-arbre
+    assert task.parent_id is None
+    assert Task.find_descendants(week.id) == [tuesday]
+    assert [t.id for t in Task.find_descendants(task.id)] == [sub.id]
+    assert not Task.is_descendant_of(sub.id, week.id)
+    assert (week.subtasks_done, week.subtasks_total, week.status) == (1, 1, True)
+
+    closure = db.session.query(TaskClosure.ancestor_id, TaskClosure.descendant_id, TaskClosure.depth)
+    expected = set(closure)
+    Task.rebuild_closure()
+    assert set(closure) == expected
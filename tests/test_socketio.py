@@ -0,0 +1,107 @@
+from src.extensions import socketio
+from src.models import Channel, Message, Ticket, User
+from src.utils import get_utc_now
+from tests.conftest import login_as
+
+
+def _events(client, name):
+    return [event["args"][0] for event in client.get_received() if event["name"] == name]
+
+
+def test_unread_counts_snapshot_on_connect_then_deltas(app):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    bob = User.create_user("bob", "bob@example.com", "secret")
+    channel = Channel.create(name="Discussion ticket #1")
+    ticket = Ticket.create(title="Ticket", content="contenu", author_id=alice.id, channel_id=channel.id)
+    Message.create(content="déjà là", author_id=alice.id, channel_id=channel.id)
+
+    alice_http, bob_http = app.test_client(), app.test_client()
+    login_as(alice_http, alice)
+    login_as(bob_http, bob)
+    alice_socket = socketio.test_client(app, flask_test_client=alice_http)
+    bob_socket = socketio.test_client(app, flask_test_client=bob_http)
+
+    assert _events(bob_socket, "unread_counts") == [{str(ticket.id): 1}]
+    assert _events(alice_socket, "unread_counts") == [{}]
+
+    alice_socket.emit("send_message", {"channel_id": channel.id, "content": "bonjour"})
+    delta = {"ticket_id": ticket.id, "channel_id": channel.id, "author_id": alice.id, "delta": 1}
+    assert _events(bob_socket, "unread_delta") == [delta]
+    assert _events(alice_socket, "unread_delta") == [delta]
+
+    assert bob_http.post("/api/messages/mark-read", json={"ticket_id": ticket.id}).json == {"marked": 2}
+    assert _events(bob_socket, "unread_reset") == [{"ticket_id": ticket.id}]
+    assert _events(alice_socket, "unread_reset") == []
+
+
+def test_message_queue_writes_a_burst_in_one_insert_and_keeps_order(app, monkeypatch):
+    from src.socketio.write_queue import message_queue
+    from tests.conftest import count_queries
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    first, second = Channel.create(name="Un"), Channel.create(name="Deux")
+    alice_id, first_id, second_id = alice.id, first.id, second.id
+    flushed = []
+    monkeypatch.setattr(message_queue, "_after_flush", flushed.extend)
+
+    for channel_id, content in [(first_id, "a"), (second_id, "b"), (first_id, "c")]:
+        message_queue.pending.append({"author_id": alice_id, "channel_id": channel_id, "content": content,
+                                      "created_at": get_utc_now(), "author": "alice", "sid": None})
+    with count_queries() as queries:
+        message_queue.flush()
+    assert len([q for q in queries if q.startswith("INSERT")]) == 1
+    assert [row["content"] for row in flushed] == ["a", "b", "c"]
+    assert [row["id"] for row in flushed] == sorted(row["id"] for row in flushed)
+    assert [m.content for m in Message.find_since(first_id)] == ["a", "c"]
+
+    # une ligne invalide n'emporte pas le reste du lot
+    flushed.clear()
+    row = {"author_id": alice_id, "channel_id": first_id, "created_at": get_utc_now()}
+    message_queue.pending.extend([{**row, "content": None, "sid": "x"}, {**row, "content": "d", "sid": "y"}])
+    message_queue.flush()
+    assert flushed[0]["id"] is None and flushed[1]["id"] is not None
+    assert message_queue.metrics()["depth"] == 0
+
+
+def test_metrics_are_reserved_to_admins(api_client):
+    login_as(api_client, User.create_user("bob", "bob@example.com", "secret"))
+    assert api_client.get("/api/metrics").status_code == 403
+
+    login_as(api_client, User.create_user("root", "root@example.com", "secret", role="admin"))
+    metrics = api_client.get("/api/metrics").json
+    assert {"depth", "max_depth", "batches", "messages", "avg_batch"} <= set(metrics["message_queue"])
+    assert {"size", "hits", "misses", "hit_rate"} <= set(metrics["user_cache"])
+
+
+def test_broadcasts_reach_clients_connected_to_another_worker(app):
+    from flask import Flask
+    from flask_socketio import SocketIO, join_room
+
+    from src.extensions import LocalPubSubManager
+    from src.service import send_notification
+
+    # second worker : autre serveur Socket.IO, relié au premier par le courtier local
+    other_app = Flask("worker_2")
+    other = SocketIO(other_app, async_mode="threading",
+                     client_manager=LocalPubSubManager(app.config["SOCKETIO_CHANNEL"]))
+
+    @other.on("connect")
+    def join_rooms(auth):
+        for room in auth["rooms"]:
+            join_room(room)
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    bob = User.create_user("bob", "bob@example.com", "secret")
+    channel = Channel.create(name="Discussion ticket #1")
+    bob_elsewhere = other.test_client(other_app, auth={"rooms": [f"user_{bob.id}", f"channel_{channel.id}"]})
+
+    send_notification(receiver_id=bob.id, message="Votre ticket est resolu", notification_type="statut")
+    assert _events(bob_elsewhere, "new_notifications") == [
+        [{"message": "Votre ticket est resolu", "notification_type": "statut", "ticket_id": None}]
+    ]
+
+    alice_http = app.test_client()
+    login_as(alice_http, alice)
+    alice_socket = socketio.test_client(app, flask_test_client=alice_http)
+    alice_socket.emit("send_message", {"channel_id": channel.id, "content": "bonjour"})
+    assert [m["content"] for m in _events(bob_elsewhere, "new_message")] == ["bonjour"]
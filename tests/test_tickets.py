@@ -0,0 +1,302 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.models import Ticket, User
+
+
+@pytest.fixture
+def tickets(app):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    bob = User.create_user("bob", "bob@example.com", "secret")
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    created = []
+    for i in range(7):
+        created.append(Ticket.create(
+            title=f"Ticket {i}",
+            content="bug réseau" if i % 2 else "question git",
+            categorie="bug" if i % 2 else "question",
+            author_id=alice.id if i < 4 else bob.id,
+            # deux tickets partagent la même date pour vérifier le départage par id
+            created_at=start + timedelta(hours=min(i, 5)),
+        ))
+    return created
+
+
+def walk_pages(api_client, **params):
+    ids, cursor = [], None
+    while True:
+        query = dict(params, limit=2)
+        if cursor:
+            query["cursor"] = cursor
+        response = api_client.get("/api/tickets", query_string=query)
+        assert response.status_code == 200
+        ids += [t["id"] for t in response.json["tickets"]]
+        cursor = response.json["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_api_tickets_keyset_pages_cover_every_ticket_once(api_client, tickets):
+    ids = walk_pages(api_client)
+    assert ids == [7, 6, 5, 4, 3, 2, 1]
+
+    ids = walk_pages(api_client, sort="oldest")
+    assert ids == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_api_tickets_cursor_keeps_filters(api_client, tickets):
+    assert walk_pages(api_client, categorie="bug") == [6, 4, 2]
+    assert walk_pages(api_client, author="bob", sort="oldest") == [5, 6, 7]
+    assert walk_pages(api_client, q="git", status="en_attente") == [7, 5, 3, 1]
+
+
+def test_api_tickets_rejects_invalid_cursor(api_client, tickets):
+    response = api_client.get("/api/tickets", query_string={"cursor": "pas-un-curseur"})
+    assert response.status_code == 400
+
+
+def test_manage_ticket_links_to_next_page(api_client, tickets):
+    response = api_client.get("/ticket/", query_string={"limit": 3})
+    assert response.status_code == 200
+    assert b"Ticket 6" in response.data
+    assert b"Ticket 3" not in response.data
+    assert b"cursor=" in response.data
+
+
+def test_search_uses_fulltext_index_and_ranks_results(app, api_client):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    in_content = Ticket.create(title="Question", content="Le réseau tombe", author_id=alice.id)
+    in_title = Ticket.create(title="Réseau lent", content="depuis ce matin", author_id=alice.id)
+    Ticket.create(title="Autre", content="rien à voir", author_id=alice.id)
+
+    response = api_client.get("/api/tickets", query_string={"q": "resea", "sort": "pertinence"})
+    assert [t["id"] for t in response.json["tickets"]] == [in_title.id, in_content.id]
+
+    in_content.update(content="plus de panne")
+    response = api_client.get("/api/tickets", query_string={"q": "réseau"})
+    assert [t["id"] for t in response.json["tickets"]] == [in_title.id]
+
+
+def test_search_reindex_command_backfills_existing_rows(app):
+    from src.models.database import db
+    from src.models.search import rebuild_search_index
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    db.session.add(Ticket(title="Import brut", content="sans index", author_id=alice.id))
+    db.session.commit()
+    assert Ticket.search(q="import").count() == 0
+
+    assert rebuild_search_index() == 1
+    assert Ticket.search(q="import").count() == 1
+
+
+def test_manage_ticket_query_count_does_not_grow_with_tickets(app, api_client):
+    from src.models import Channel, Message
+    from tests.conftest import count_queries, login_as
+
+    users = [User.create_user(f"user{i}", f"user{i}@example.com", "secret") for i in range(3)]
+    login_as(api_client, users[0])
+
+    def add_tickets(count):
+        for _ in range(count):
+            channel = Channel.create(name="discussion")
+            Ticket.create(title="T", content="C", author_id=users[1].id, channel_id=channel.id)
+            for user in users:
+                Message.create(content="msg", author_id=user.id, channel_id=channel.id)
+
+    add_tickets(1)
+    api_client.get("/ticket/")  # met l'utilisateur connecté en cache
+    with count_queries() as few:
+        assert api_client.get("/ticket/").status_code == 200
+
+    add_tickets(9)
+    with count_queries() as many:
+        assert api_client.get("/ticket/").status_code == 200
+
+    assert len(many) == len(few)
+    assert len(many) <= 5
+
+
+def test_api_tickets_streams_every_filtered_ticket(app, api_client, tickets, monkeypatch):
+    import json
+
+    monkeypatch.setitem(app.config, "STREAM_CHUNK_SIZE", 2)
+    response = api_client.get("/api/tickets", query_string={"stream": "json", "categorie": "bug"})
+    assert response.is_streamed
+    assert [t["id"] for t in json.loads(response.data)] == [6, 4, 2]
+
+    response = api_client.get("/api/tickets", query_string={"stream": "ndjson", "sort": "oldest"})
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.data.decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_create_ticket_commits_ticket_and_channel_once(app, api_client):
+    from sqlalchemy import event
+
+    from src.models.database import db
+    from tests.conftest import login_as
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    login_as(api_client, alice)
+
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(db.engine, "commit", on_commit)
+    try:
+        response = api_client.post("/ticket/new", data={"title": "Bug", "content": "500", "categorie": "bug"})
+    finally:
+        event.remove(db.engine, "commit", on_commit)
+    assert response.status_code == 302
+    assert len(commits) == 1
+
+    ticket = Ticket.query.one()
+    assert ticket.channel.name == f"Discussion ticket #{ticket.id}"
+
+
+def test_unit_of_work_rolls_back_every_write_on_error(app):
+    from src.models import Channel
+    from src.models.database import unit_of_work
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    with pytest.raises(RuntimeError):
+        with unit_of_work():
+            Ticket.create(title="A", content="B", author_id=alice.id)
+            with unit_of_work():
+                Channel.create(name="imbriqué")
+            raise RuntimeError("échec après les deux créations")
+
+    assert Ticket.query.count() == 0
+    assert Channel.query.count() == 0
+
+
+def test_bulk_status_update_batches_notifications_by_room(app, api_client, monkeypatch):
+    from src import service
+    from src.models import Channel, Message, Notification
+    from tests.conftest import login_as
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    bob = User.create_user("bob", "bob@example.com", "secret")
+    carol = User.create_user("carol", "carol@example.com", "secret")
+    login_as(api_client, alice)
+    t1 = Ticket.create(title="A1", content="x", author_id=alice.id)
+    t2 = Ticket.create(title="A2", content="x", author_id=alice.id)
+    channel = Channel.create(name="discussion")
+    t3 = Ticket.create(title="B1", content="x", author_id=bob.id, channel_id=channel.id)
+    for user in (carol, alice):
+        Message.create(content="msg", author_id=user.id, channel_id=channel.id)
+    done = Ticket.create(title="B2", content="x", author_id=bob.id, status="resolu")
+
+    from sqlalchemy import text
+
+    from src.models.database import db
+
+    emitted = []
+
+    def fake_emit(event, payload, room):
+        # connexion séparée : ne voit que ce qui est déjà validé
+        with db.engine.connect() as conn:
+            committed = conn.execute(text('SELECT count(*) FROM "Notification"')).scalar()
+        emitted.append((event, room, committed))
+
+    monkeypatch.setattr(service.socketio, "emit", fake_emit)
+
+    response = api_client.post("/ticket/bulk_update_status",
+                               json={"ticket_ids": [t1.id, t2.id, t3.id, done.id], "status": "resolu"})
+
+    assert response.json == {"success": True, "updated": [t1.id, t2.id, t3.id]}
+    assert Ticket.query.filter_by(status="resolu").count() == 4
+    # mêmes destinataires et même message qu'un changement unitaire :
+    # les participants sauf alice, qui reste notifiée pour ses propres tickets
+    assert sorted((n.user_id, n.message) for n in Notification.query) == [
+        (alice.id, "Le ticket « A1 » est resolu"),
+        (alice.id, "Le ticket « A2 » est resolu"),
+        (bob.id, "Le ticket « B1 » est resolu"),
+        (carol.id, "Le ticket « B1 » est resolu"),
+    ]
+    # un événement par liste de notifications, émis une fois les notifications validées
+    assert sorted(emitted) == [("new_notifications", [f"user_{alice.id}"], 4),
+                               ("new_notifications", [f"user_{bob.id}", f"user_{carol.id}"], 4)]
+
+
+def test_status_update_notifies_every_participant_in_one_insert(app, api_client, monkeypatch):
+    from src import service
+    from src.models import Channel, Message, Notification
+    from tests.conftest import count_queries, login_as
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    bob = User.create_user("bob", "bob@example.com", "secret")
+    carol = User.create_user("carol", "carol@example.com", "secret")
+    channel = Channel.create(name="discussion")
+    ticket = Ticket.create(title="T", content="x", author_id=alice.id, channel_id=channel.id)
+    for user in (bob, carol, bob):
+        Message.create(content="msg", author_id=user.id, channel_id=channel.id)
+    assert ticket.participant_ids() == [alice.id, bob.id, carol.id]
+
+    from sqlalchemy import text
+
+    from src.models.database import db
+
+    emitted = []
+
+    def fake_emit(event, payload, room):
+        with db.engine.connect() as conn:
+            committed = conn.execute(text('SELECT count(*) FROM "Notification"')).scalar()
+        emitted.append((event, room, committed))
+
+    monkeypatch.setattr(service.socketio, "emit", fake_emit)
+    login_as(api_client, carol)
+
+    with count_queries() as queries:
+        api_client.post(f"/ticket/{ticket.id}/update_status", data={"status": "resolu"})
+
+    assert sorted(n.user_id for n in Notification.query) == [alice.id, bob.id]
+    assert len([q for q in queries if q.startswith('INSERT INTO "Notification"')]) == 1
+    assert emitted == [("new_notifications", [f"user_{alice.id}", f"user_{bob.id}"], 2)]
+
+
+def test_bulk_status_update_rejects_unknown_status(app, api_client):
+    from tests.conftest import login_as
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    login_as(api_client, alice)
+    response = api_client.post("/ticket/bulk_update_status", json={"ticket_ids": [1], "status": "perdu"})
+    assert response.status_code == 400
+
+    # true serait lu comme le ticket 1
+    Ticket.create(title="T", content="x", author_id=alice.id)
+    response = api_client.post("/ticket/bulk_update_status", json={"ticket_ids": [True], "status": "resolu"})
+    assert response.status_code == 400
+    assert Ticket.query.filter_by(status="resolu").count() == 0
+
+
+def test_ticket_stats_follow_writes_and_match_rebuild(app, api_client):
+    from src.models.database import db
+    from src.models.ticket_stats import TicketCount, rebuild_ticket_stats
+
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    bob = User.create_user("bob", "bob@example.com", "secret")
+    past = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    t1 = Ticket.create(title="A", content="x", categorie="bug", author_id=alice.id, deadline=past)
+    t2 = Ticket.create(title="B", content="x", categorie="bug", author_id=alice.id)
+    Ticket.create(title="C", content="x", categorie="git", author_id=bob.id, deadline=past)
+    t2.update(status="en_cours")
+    Ticket.bulk_update_status([t1.id, t2.id], "resolu")
+    db.session.commit()
+
+    stats = api_client.get("/api/tickets/stats").json
+    assert stats["total"] == 3
+    assert stats["by_status_categorie"] == {"resolu": {"bug": 2}, "en_attente": {"git": 1}}
+    assert stats["by_categorie"] == {"bug": 2, "git": 1}
+    assert stats["overdue"] == 1
+    assert [(a["username"], a["count"]) for a in stats["by_author"]] == [("alice", 2), ("bob", 1)]
+
+    # une dérive (écriture SQL directe) est corrigée par la reconstruction
+    db.session.execute(db.update(TicketCount).values(count=42))
+    db.session.commit()
+    assert rebuild_ticket_stats() == 3
+    assert api_client.get("/api/tickets/stats").json == stats
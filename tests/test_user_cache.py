@@ -0,0 +1,62 @@
+from src.auth.user_cache import UserCache, user_cache
+from src.models import User
+from src.models.database import db
+from tests.conftest import count_queries, login_as
+
+
+def test_logged_in_user_is_read_once_then_served_from_cache(api_client):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    login_as(api_client, alice)
+
+    with count_queries() as first:
+        assert api_client.get("/health").status_code == 200
+    with count_queries() as second:
+        assert api_client.get("/health").status_code == 200
+    assert len(first) == 1 and len(second) == 0
+    assert user_cache.metrics()["hits"] >= 1
+
+
+def test_user_changes_invalidate_the_snapshot_after_commit(app):
+    alice = User.create_user("alice", "alice@example.com", "secret")
+    assert user_cache.get(alice.id).role == "user"
+
+    alice.role = "admin"
+    alice.save()
+    snapshot = user_cache.get(alice.id)
+    assert snapshot.role == "admin" and snapshot.is_admin_user()
+
+    alice.set_password("nouveau")
+    alice.save()
+    assert alice.id not in user_cache.entries
+
+
+def test_cache_is_bounded_and_expires(app):
+    users = [User.create_user(f"user{i}", f"user{i}@example.com", "secret") for i in range(3)]
+    cache = UserCache(size=2, ttl=60)
+    for user in users:
+        cache.get(user.id)
+    assert list(cache.entries) == [users[1].id, users[2].id]
+    assert cache.metrics()["evictions"] == 1
+
+    cache.ttl = -1  # toute entrée ajoutée est déjà expirée
+    cache.get(users[0].id)
+    cache.get(users[0].id)
+    assert cache.metrics()["misses"] == 5
+
+
+def test_admin_rights_are_checked_against_the_database(api_client):
+    root = User.create_user("root", "root@example.com", "secret", role="admin")
+    login_as(api_client, root)
+    assert api_client.get("/api/metrics").status_code == 200
+    assert user_cache.get(root.id).is_admin_user()
+
+    # rétrogradé par un autre worker : aucun événement ORM, l'instantané en cache est encore admin
+    db.session.execute(db.update(User).where(User.id == root.id).values(role="user"))
+    db.session.commit()
+    assert api_client.get("/api/metrics").status_code == 403
+    assert api_client.delete("/tasks/1/delete").status_code == 302
+    assert user_cache.entries[root.id][1].role == "user"  # instantané périmé remplacé
+
+    db.session.execute(db.delete(User).where(User.id == root.id))
+    db.session.commit()
+    assert api_client.get("/api/metrics").status_code == 403  # supprimé : plus aucun droit admin